@@ -1,5 +1,7 @@
 import csv
-import itertools
+import math
+import time
+import types
 import cProfile
 
 
@@ -8,103 +10,204 @@ import cProfile
 Upon trying out storing the valid options for a cell in a mapping data structures, I noticed about an 80% decrease in running time. However, it still is not significant enough to actually solve harder problems. With that in mind, I want to try implementing a more "human" logic to this. Whenever I do a sudoku board, and I don't find a cell with a single valid option, I check the other cells in the row/col/box and see if there is a shared value they cannot store. If they cannot store that shared value, then that cell must store the value. For example, in a 9x9 board, every row/col/box must store a 5. If cell X has multiple options including 5, and all the other cells in the same row/box/col do not have 5 as a valid option, then cell X must contain 5 and I can ignore all the other options.
 
 Whenever a random value is attempted, then try out the logical deduction on the current state of the board over and over again until no more deductions can be made and return a list of all cells that were modified. If the current path fails, then undo all modifications.
+
+Modifications after the contest:
+- The legal options of a cell are stored as a single integer bitmask (bit v - 1 is set if v is legal) instead of a list of n2 booleans, and the values used in every row/col/box are bitmasks as well. Checking a move, updating options and counting options (popcount) are now bit operations, and options_count is no longer needed.
+- Cells are addressed by a flat index (row * n2 + col) instead of (row, col) tuples. The row/col/box of every cell, the cells of every section and a deduplicated peer list for every cell are precomputed once per board size in a Layout and shared by every Board of that size. board.board is still available as a read-only (row, col) mapping, and cells are filled in with make_move.
+- Every placement and option elimination is recorded on a trail (undo log). The solver takes a checkpoint before each guess and rolls back to it on failure, which restores the board exactly in O(changes) instead of undoing cells one by one and recalculating their options.
+- The search is a loop over an explicit stack of guesses instead of a recursive call per guess, so deep boards cannot hit the recursion limit. Solver(max_depth, max_nodes, max_seconds) can cap how deep, how much and how long the search goes; Solver.exhausted tells whether the last solve gave up because of those caps.
+- Deduction is driven by a work queue instead of sweeping the whole board until nothing changes. Whenever a cell is filled or loses an option it is queued; a queued cell with one option is filled in, and only the row/col/box of a queued cell is searched for hidden singles. Cells with no options and values with nowhere to go are caught right away as contradictions.
+- Unsolved cells are kept in buckets by their number of options, updated on every elimination, placement and rollback, so finding the most constrained cell no longer scans the board. Solver(tie_break=...) can choose between equally constrained cells, e.g. by Board.count_unsolved_peers.
+- When singles stall, a Solver(techniques=LOGIC_TECHNIQUES) looks for locked candidates (pointing and claiming) and then naked and hidden pairs/triples/quads in the rows/cols/boxes that changed, and their eliminations go through the trail like every other change. Fish (X-Wing, Swordfish, Jellyfish and larger) are added by Solver(techniques=ALL_TECHNIQUES). Solver.technique_stats shows the time spent and options eliminated by every technique.
+- Solver.count_solutions(board, limit) and Solver.has_unique_solution(board) run the same search but keep backtracking past the first solution, stopping as soon as the limit is reached (the second solution by default), and roll the board back to how it was given.
+- Solver.propagate_seconds and Solver.search_seconds split the time of the last solve into the first deduction and the search after it, so that a slowdown can be pinned on deduction or on guessing.
+- Solver.solveBoard(board, stats=True) returns a SolveResult instead of a bool, with the guesses, backtracks and deepest guess of the search, the cells filled in by naked singles, hidden singles and guesses, the options eliminated by filled in cells and by every technique, and the time taken. The counters that are not kept anyway are only updated while a SolveResult is being filled in, so a plain solveBoard(board) does no extra work.
  '''
 
+# Reads a csv board file into a row-major list of cell values, where 0 is an empty cell.
+def read_sudoku(filename):
+    with open(filename) as csv_file:
+        values = []
+
+        for row in csv.reader(csv_file):
+            for item in row:
+                values.append(0 if item == '' else int(item))
+
+    return values
+
+# A mapping from n (the box width) to the Layout of boards of that size, so that the tables are only built once per board size.
+layouts = {}
+
+# Gets the shared Layout for boards with boxes of width n.
+def get_layout(n):
+    layout = layouts.get(n)
+
+    if layout is None:
+        layout = Layout(n)
+        layouts[n] = layout
+
+    return layout
+
+# The precomputed cell tables for one board size. Cells are numbered 0..n2*n2-1 in row-major order, so cell = row * n2 + col.
+class Layout:
+    def __init__(self, n):
+        self.n = n
+        self.n2 = n * n
+        self.num_cells = self.n2 * self.n2
+
+        # A mapping from a cell to the row/col/box # containing it.
+        self.row_of = [cell // self.n2 for cell in range(self.num_cells)]
+        self.col_of = [cell % self.n2 for cell in range(self.num_cells)]
+        self.box_of = [n * (self.row_of[cell] // n) + self.col_of[cell] // n for cell in range(self.num_cells)]
+
+        # A mapping from a row/col/box # to a list of cells in that section.
+        self.cells_in_rows = [[] for i in range(self.n2)]
+        self.cells_in_cols = [[] for i in range(self.n2)]
+        self.cells_in_boxes = [[] for i in range(self.n2)]
+
+        for cell in range(self.num_cells):
+            self.cells_in_rows[self.row_of[cell]].append(cell)
+            self.cells_in_cols[self.col_of[cell]].append(cell)
+            self.cells_in_boxes[self.box_of[cell]].append(cell)
+
+        # Every row, col and box as one list of sections. Rows are numbered 0..n2-1, cols n2..2*n2-1 and boxes 2*n2..3*n2-1.
+        self.units = self.cells_in_rows + self.cells_in_cols + self.cells_in_boxes
+
+        # A mapping from a cell to the numbers of its row, col and box in units.
+        self.units_of = [(self.row_of[cell], self.n2 + self.col_of[cell], 2 * self.n2 + self.box_of[cell]) for cell in range(self.num_cells)]
+
+        # A mapping from a cell to the list of every other cell sharing its row, col or box. Each peer is only listed once.
+        self.peers = []
+
+        for cell in range(self.num_cells):
+            peers = set(self.cells_in_rows[self.row_of[cell]])
+            peers.update(self.cells_in_cols[self.col_of[cell]])
+            peers.update(self.cells_in_boxes[self.box_of[cell]])
+            peers.discard(cell)
+            self.peers.append(sorted(peers))
+
 class Board:
-    def __init__(self, filename):
+    # Loads the board from a csv file, or leaves it empty for load_values if no filename is given.
+    def __init__(self, filename=None):
         self.n = 0
         self.n2 = 0
 
-        # A mapping from a cell to the number in that cell.
-        self.board = None
+        # The shared tables for this board size.
+        self.layout = None
 
-        # A mapping from a row/col/box # to a set of values contained in that box.
-        self.vals_in_rows = None
-        self.vals_in_cols = None
-        self.vals_in_boxes = None
+        # A mapping from a cell to the number in that cell (0 if empty).
+        self.values = None
 
-        # A mapping from a row/col/box # to a list of cells in that section.
+        # A mapping from a row/col/box # to a bitmask of the values contained in that section. Value v is stored in bit (v - 1).
+        self.used_in_rows = None
+        self.used_in_cols = None
+        self.used_in_boxes = None
+
+        # A mapping from a cell to its row/col/box # (shared with the layout).
+        self.row_of = None
+        self.col_of = None
+        self.box_of = None
+
+        # A mapping from a row/col/box # to a list of cells in that section (shared with the layout).
         self.cells_in_rows = None
         self.cells_in_cols = None
         self.cells_in_boxes = None
 
+        # A mapping from a cell to the other cells in its row/col/box (shared with the layout).
+        self.peers = None
+
+        # Every row/col/box as one list, and a mapping from a cell to the numbers of its sections in that list (shared with the layout).
+        self.units = None
+        self.units_of = None
+
         # A set of unsolved board spaces.
         self.unsolved_cells = None
 
         # The set of static cells (cells that were filled at the beginning of the game).
         self.static_cells = None
 
-        # A mapping from a cell to the valid options for that cell. Those valid options are stored in a list of size n2.
+        # A mapping from a cell to a bitmask of the valid options for that cell. Option v is legal if bit (v - 1) is set.
         self.legal_options = None
 
-        # A mapping from a cell to the number of options it has.
-        self.options_count = None
-        self.load_sudoku(filename)
+        # A mapping from a number of options k to the set of unsolved cells that have exactly k legal options. Kept up to date on every change so the most constrained cell can be found without scanning the board.
+        self.cells_by_options = None
+
+        # A bitmask with all n2 options set.
+        self.all_options = 0
+
+        # The undo log. Every change to the board is recorded as a (cell, old_options) pair, where old_options is the bitmask of the cell before an option was eliminated, or None if a value was placed in the cell.
+        self.trail = None
+
+        # The work queue of cells that were filled or lost an option since the solver last looked at them.
+        self.pending_cells = None
+
+        if filename is not None:
+            self.load_sudoku(filename)
+
+    # A read-only mapping from a (row, col) pair to the number in that cell, built from values on every access. Writing to it raises a TypeError: cells are filled in with make_move, which keeps the options of the other cells up to date.
+    @property
+    def board(self):
+        return types.MappingProxyType({(cell // self.n2, cell % self.n2): val for cell, val in enumerate(self.values)})
 
     # Loads the sudoku board from the given file.
     def load_sudoku(self, filename):
-        with open(filename) as csv_file:
-            self.n = - 1
-            reader = csv.reader(csv_file)
-
-            for row in reader:
-                if self.n == -1:
-                    self.n = int(len(row) ** (1/2))
-                    self.n2 = int(len(row))
-                    self.board = {}
-
-                    self.vals_in_rows = [set() for i in range(self.n2)]
-                    self.vals_in_cols = [set() for i in range(self.n2)]
-                    self.vals_in_boxes = [set() for i in range(self.n2)]
-                    self.cells_in_rows = [set() for i in range(self.n2)]
-                    self.cells_in_cols = [set() for i in range(self.n2)]
-                    self.cells_in_boxes = [set() for i in range(self.n2)]
-
-                    self.unsolved_cells = set(itertools.product(range(self.n2), range(self.n2)))
-                    self.legal_options = {}
-                    self.options_count = {}
-                    self.static_cells = set()
-
-                    # Add all cells to the correct row/col/box section.
-                    for row_num in range(self.n2):
-                        for col_num in range(self.n2):
-                            self.cells_in_rows[row_num].add((row_num, col_num))
-
-                    for col_num in range(self.n2):
-                        for row_num in range(self.n2):
-                            self.cells_in_cols[col_num].add((row_num, col_num))
-
-                    for box_num in range(self.n2):
-                        first_row = (box_num // self.n) * self.n
-                        first_col = (box_num % self.n) * self.n
-
-                        for i in range(self.n2):
-                            self.cells_in_boxes[box_num].add((first_row + i // self.n, first_col + i % self.n))
-
-                for col_num, item in enumerate(row):
-                    val = 0 if item == '' else int(item)
-                    row_num = reader.line_num - 1
-
-                    self.board[(row_num, col_num)] = val
-                    self.legal_options[(row_num, col_num)] = [False for i in range(self.n2)]
-                    self.options_count[(row_num, col_num)] = 0
-
-
-                    # If there is a value, mark it in its respective row/col/box
-                    if val != 0:
-                        self.vals_in_rows[row_num].add(val)
-                        self.vals_in_cols[col_num].add(val)
-                        self.vals_in_boxes[self.get_box_num((row_num, col_num))].add(val)
-                        self.unsolved_cells.remove((row_num, col_num))
-                        self.static_cells.add((row_num, col_num))
-
-
-            # Fill in legal_options for every unsolved cell.
-            for cell in self.unsolved_cells:
-                for index in range(self.n2):
-                    if self.is_legal_move(cell, index + 1):
-                        self.legal_options[cell][index] = True
-                        self.options_count[cell] += 1
+        self.load_values(read_sudoku(filename))
+
+    # Loads the board from a row-major list of n2 * n2 cell values, where 0 is an empty cell. The board keeps the list.
+    def load_values(self, values):
+        self.n2 = math.isqrt(len(values))
+        self.n = math.isqrt(self.n2)
+        self.layout = get_layout(self.n)
+        self.all_options = (1 << self.n2) - 1
+
+        self.row_of = self.layout.row_of
+        self.col_of = self.layout.col_of
+        self.box_of = self.layout.box_of
+        self.cells_in_rows = self.layout.cells_in_rows
+        self.cells_in_cols = self.layout.cells_in_cols
+        self.cells_in_boxes = self.layout.cells_in_boxes
+        self.peers = self.layout.peers
+        self.units = self.layout.units
+        self.units_of = self.layout.units_of
+
+        self.values = values
+        self.used_in_rows = [0 for i in range(self.n2)]
+        self.used_in_cols = [0 for i in range(self.n2)]
+        self.used_in_boxes = [0 for i in range(self.n2)]
+        self.unsolved_cells = set()
+        self.static_cells = set()
+        self.legal_options = [0 for i in range(self.layout.num_cells)]
+        self.trail = []
+        self.pending_cells = []
+
+        # If there is a value, mark it in its respective row/col/box
+        for cell, val in enumerate(values):
+            if val != 0:
+                bit = 1 << (val - 1)
+                self.used_in_rows[self.row_of[cell]] |= bit
+                self.used_in_cols[self.col_of[cell]] |= bit
+                self.used_in_boxes[self.box_of[cell]] |= bit
+                self.static_cells.add(cell)
+            else:
+                self.unsolved_cells.add(cell)
+
+        # Fill in legal_options for every unsolved cell. The legal options are whichever values are not used in the cell's row, column or box.
+        self.cells_by_options = [set() for i in range(self.n2 + 1)]
+
+        for cell in self.unsolved_cells:
+            used = self.used_in_rows[self.row_of[cell]] | self.used_in_cols[self.col_of[cell]] | self.used_in_boxes[self.box_of[cell]]
+            self.legal_options[cell] = self.all_options & ~used
+            self.cells_by_options[self.legal_options[cell].bit_count()].add(cell)
+
+    # Saves the board to the given file in the same csv format it is loaded from. Empty cells are left blank.
+    def save_sudoku(self, filename):
+        lines = []
+
+        for row in self.cells_in_rows:
+            lines.append(','.join(str(self.values[cell]) if self.values[cell] else '' for cell in row))
+
+        with open(filename, 'w') as csv_file:
+            csv_file.write('\n'.join(lines))
 
     # prints out a command line representation of the board
     def print(self):
@@ -120,7 +223,7 @@ class Board:
 
             for c in range(self.n2):
 
-                val = self.board[(r,c)]
+                val = self.values[self.get_cell(r, c)]
 
                 # add column divider
                 if c % self.n == 0 and not c == 0:
@@ -137,61 +240,67 @@ class Board:
                     else: row += str(val)
             print(row)
 
+    # Returns the cell number of a given row and column.
+    def get_cell(self, row, col):
+        return row * self.n2 + col
+
     # Returns the box number containing a given cell.
     def get_box_num(self, cell):
-        return self.n * (cell[0] // self.n) + cell[1] // self.n
+        return self.box_of[cell]
+
+    # Returns the bitmask of values that are already used by the row, column and box of a given cell.
+    def get_used(self, cell):
+        return self.used_in_rows[self.row_of[cell]] | self.used_in_cols[self.col_of[cell]] | self.used_in_boxes[self.box_of[cell]]
 
 
     # Checks if a given value can legally be put in a given cell.
     def is_legal_move(self, cell, value):
-        in_bounds = cell[0] >= 0 and cell[0] < self.n2 and cell[1] >= 0 and cell[1] < self.n2
-        not_in_row = value not in self.vals_in_rows[cell[0]]
-        not_in_col = value not in self.vals_in_cols[cell[1]]
-        not_in_box = value not in self.vals_in_boxes[self.get_box_num(cell)]
+        in_bounds = cell >= 0 and cell < self.layout.num_cells
 
-        return in_bounds and not_in_row and not_in_col and not_in_box
+        return in_bounds and not self.get_used(cell) & (1 << (value - 1))
 
 
     # Places a given value in a given cell.
     def make_move(self, cell, value):
         if cell in self.unsolved_cells:
-            self.board[cell] = value
-            self.vals_in_rows[cell[0]].add(value)
-            self.vals_in_cols[cell[1]].add(value)
-            self.vals_in_boxes[self.get_box_num(cell)].add(value)
+            bit = 1 << (value - 1)
+            self.values[cell] = value
+            self.used_in_rows[self.row_of[cell]] |= bit
+            self.used_in_cols[self.col_of[cell]] |= bit
+            self.used_in_boxes[self.box_of[cell]] |= bit
             self.unsolved_cells.remove(cell)
+            self.cells_by_options[self.legal_options[cell].bit_count()].remove(cell)
+            self.trail.append((cell, None))
+            self.pending_cells.append(cell)
             self.update_options_fill(cell, value)
 
-
-    # Cleans out a given cell and makes it empty.
-    def undo_move(self, cell):
-        if cell not in self.unsolved_cells:
-            prev_val = self.board[cell]
-            self.board[cell] = 0
-            self.vals_in_rows[cell[0]].discard(prev_val)
-            self.vals_in_cols[cell[1]].discard(prev_val)
-            self.vals_in_boxes[self.get_box_num(cell)].discard(prev_val)
-            self.unsolved_cells.add(cell)
-            self.update_options_clear(cell, prev_val)
-            return prev_val
-
-    # Cleans out every cell in a set of cells.
-    def undo_all_moves(self, cells):
-        undone_options = set()
-
-        for cell in cells:
-            undone_options.add(self.undo_move(cell))
-
-        # Since the cells are removed sequentially, then their legal_options have to be recalculated. If cell A is removed before cell B, cell A's legal_options doesn't account for the fact that cell B will be removed.
-        for cell in cells:
-            self.recalculate_options(cell, undone_options)
-
-    # Recalculates the options from a given list of options for a given cell.
-    def recalculate_options(self, cell, options):
-        for option in options:
-            if self.is_legal_move(cell, option) and not self.legal_options[cell][option - 1]:
-                self.legal_options[cell][option - 1] = True
-                self.options_count[cell] += 1
+    # Returns a checkpoint that the board can later be rolled back to.
+    def checkpoint(self):
+        return len(self.trail)
+
+    # Undoes every placement and elimination made since a given checkpoint, restoring the board exactly as it was. Any pending work is about the undone changes, so it is dropped.
+    def rollback(self, checkpoint):
+        trail = self.trail
+        legal_options = self.legal_options
+        cells_by_options = self.cells_by_options
+        del self.pending_cells[:]
+
+        while len(trail) > checkpoint:
+            cell, old_options = trail.pop()
+
+            if old_options is None:
+                bit = ~(1 << (self.values[cell] - 1))
+                self.values[cell] = 0
+                self.used_in_rows[self.row_of[cell]] &= bit
+                self.used_in_cols[self.col_of[cell]] &= bit
+                self.used_in_boxes[self.box_of[cell]] &= bit
+                self.unsolved_cells.add(cell)
+                cells_by_options[legal_options[cell].bit_count()].add(cell)
+            else:
+                # Options are only ever eliminated from unsolved cells, so the cell is still unsolved at this point.
+                cells_by_options[legal_options[cell].bit_count()].remove(cell)
+                cells_by_options[old_options.bit_count()].add(cell)
+                legal_options[cell] = old_options
 
     # Gets all the cells in a given box number.
     def get_box(self, box_num):
@@ -205,235 +314,566 @@ class Board:
     def get_col(self, col_num):
         return self.cells_in_cols[col_num]
 
-    # Get the cell with the most constraints (conversely, least legal options).
-    def get_most_constrained_cell(self):
-        min_options = self.n2 + 1
-        min_cell = None
+    # Gets the number of options a given cell has.
+    def get_num_options(self, cell):
+        return self.legal_options[cell].bit_count()
 
-        for cell in self.unsolved_cells:
-            num_options = self.options_count[cell]
+    # Gets the number of unsolved cells sharing a row, col or box with a given cell.
+    def count_unsolved_peers(self, cell):
+        values = self.values
+        return sum(1 for peer in self.peers[cell] if not values[peer])
+
+    # Get the cell with the most constraints (conversely, least legal options). Ties are broken by the highest tie_break(board, cell) if a tie_break function is given (for example Board.count_unsolved_peers), otherwise by whichever cell comes first.
+    def get_most_constrained_cell(self, tie_break=None):
+        for cells in self.cells_by_options:
+            if cells:
+                if tie_break is None:
+                    return next(iter(cells))
 
-            if num_options < min_options:
-                min_options = num_options
-                min_cell = cell
+                return max(cells, key=lambda cell: tie_break(self, cell))
 
-        return min_cell
+        return None
 
     # Updates the legal options for a cell after another cell was filled.
     def update_options_fill(self, cell, value):
-        for r_cell in self.get_row(cell[0]):
-            if r_cell in self.unsolved_cells and r_cell not in self.static_cells and self.legal_options[r_cell][value - 1]:
-                self.legal_options[r_cell][value - 1] = False
-                self.options_count[r_cell] -= 1
-
-        for c_cell in self.get_col(cell[1]):
-            if c_cell in self.unsolved_cells and c_cell not in self.static_cells and self.legal_options[c_cell][value - 1]:
-                self.legal_options[c_cell][value - 1] = False
-                self.options_count[c_cell] -= 1
-
-        for b_cell in self.get_box(self.get_box_num(cell)):
-            if b_cell in self.unsolved_cells and b_cell not in self.static_cells and self.legal_options[b_cell][value - 1]:
-                self.legal_options[b_cell][value - 1] = False
-                self.options_count[b_cell] -= 1
-
-    # Updates the legal options for a cell after another cell was cleared.
-    def update_options_clear(self, cell, value):
-        for r_cell in self.get_row(cell[0]):
-            if r_cell in self.unsolved_cells and r_cell not in self.static_cells and self.is_legal_move(r_cell, value) and not self.legal_options[r_cell][value - 1]:
-                self.legal_options[r_cell][value - 1] = True
-                self.options_count[r_cell] += 1
-
-        for c_cell in self.get_col(cell[1]):
-            if c_cell in self.unsolved_cells and c_cell not in self.static_cells and self.is_legal_move(c_cell, value) and not self.legal_options[c_cell][value - 1]:
-                self.legal_options[c_cell][value - 1] = True
-                self.options_count[c_cell] += 1
-
-        for b_cell in self.get_box(self.get_box_num(cell)):
-            if b_cell in self.unsolved_cells and b_cell not in self.static_cells and self.is_legal_move(b_cell, value) and not self.legal_options[b_cell][value - 1]:
-                self.legal_options[b_cell][value - 1] = True
-                self.options_count[b_cell] += 1
-
-    # Gets the list of options for a given cell.
+        bit = 1 << (value - 1)
+        values = self.values
+        legal_options = self.legal_options
+        trail = self.trail
+        pending_cells = self.pending_cells
+        cells_by_options = self.cells_by_options
+
+        for peer in self.peers[cell]:
+            options = legal_options[peer]
+
+            if options & bit and not values[peer]:
+                trail.append((peer, options))
+                pending_cells.append(peer)
+                legal_options[peer] = options & ~bit
+
+                num_options = options.bit_count()
+                cells_by_options[num_options].remove(peer)
+                cells_by_options[num_options - 1].add(peer)
+
+    # Removes the given bitmask of options from an unsolved cell. The change is recorded on the trail and the cell is queued like any other elimination. Returns True if any of the options were still legal.
+    def eliminate(self, cell, bits):
+        options = self.legal_options[cell]
+
+        if not options & bits:
+            return False
+
+        self.trail.append((cell, options))
+        self.pending_cells.append(cell)
+        self.legal_options[cell] = options & ~bits
+
+        num_options = options.bit_count()
+        self.cells_by_options[num_options].remove(cell)
+        self.cells_by_options[(options & ~bits).bit_count()].add(cell)
+        return True
+
+    # Gets the bitmask of options for a given cell.
     def get_options(self, cell):
         return self.legal_options[cell]
 
-class Solver:
-    def __init__(self):
-        pass
+# Finds every group of 2..max_size masks whose union has exactly as many bits set as there are masks in the group. Returns a list of (indices of the masks, union) pairs. Groups are only extended while their union stays small enough, so masks with more than max_size bits never take part.
+def find_locked_sets(masks, max_size):
+    found = []
+    candidates = [i for i, mask in enumerate(masks) if 2 <= mask.bit_count() <= max_size]
+    group = []
 
-    def solveBoard(self, board):
-        # Step deduce is a list of all modified cells after doing logical deduction once.
-        step_deduce = self.find_singles(board).union(self.deduce_boxes(board)).union(self.deduce_cols(board)).union(self.deduce_rows(board))
-        deduced_cells = step_deduce
+    def extend(start, union):
+        for position in range(start, len(candidates)):
+            index = candidates[position]
+            new_union = union | masks[index]
+            num_bits = new_union.bit_count()
 
-        # repeatedly do logical deduction until no more can be done.
-        while len(step_deduce) > 0:
-            step_deduce = self.find_singles(board).union(self.deduce_boxes(board)).union(self.deduce_cols(board)).union(self.deduce_rows(board))
-            deduced_cells = deduced_cells.union(step_deduce)
+            if num_bits > max_size:
+                continue
 
+            group.append(index)
 
-        curr_cell = board.get_most_constrained_cell()
+            if num_bits == len(group):
+                found.append((list(group), new_union))
+            elif len(group) < max_size:
+                extend(position + 1, new_union)
 
-        if curr_cell is not None:
-            options = board.get_options(curr_cell)
+            group.pop()
 
-            for index, is_legal in enumerate(options):
-                if is_legal:
-                    board.make_move(curr_cell, index + 1)
+    extend(0, 0)
+    return found
 
-                    if self.solveBoard(board):
-                        return True
-                    else:
-                        board.undo_move(curr_cell)
+# Gets, for every mask in a list, the bits that are set in that mask and in no other.
+def get_exclusive_bits(masks):
+    seen_once = 0
+    seen_twice = 0
 
-            board.undo_all_moves(deduced_cells)
-            return False
-        else:
-            ret = len(board.unsolved_cells) == 0
+    for mask in masks:
+        seen_twice |= seen_once & mask
+        seen_once |= mask
+
+    return [mask & ~seen_twice for mask in masks]
 
-            if not ret:
-                board.undo_all_moves(deduced_cells)
+# The deduction techniques run by default when singles stall (see Solver.deduce), which is none of them. On the test boards, even locked candidates costs more than the guesses it saves everywhere but the two hardest folders (best of 5, per folder, against singles alone: 0.084s/0.072s for named-boards, 0.085s/0.060s for test-2-medium, 0.277s/0.294s for test-5-brutal, 0.487s/0.510s for test-6-ridiculous).
+DEFAULT_TECHNIQUES = ()
 
-            return ret
+# The techniques that a person would reach for before guessing, cheapest first. Naked and hidden subsets cost even more than locked candidates on their own (best of 5, per folder, against locked candidates alone: 0.173s/0.084s for named-boards, 0.174s/0.085s for test-2-medium, 0.113s/0.091s for test-4-tough, 0.265s/0.277s for test-5-brutal, 0.485s/0.487s for test-6-ridiculous).
+LOGIC_TECHNIQUES = ('locked_candidates', 'naked_subsets', 'hidden_subsets')
 
-    def deduce_rows(self, board):
-        # A collection of all modified cells.
-        filled_cells = set()
+# Every technique, cheapest first. Fish is left out by default because it scans every value of the whole board each time it runs.
+ALL_TECHNIQUES = LOGIC_TECHNIQUES + ('fish',)
 
-        for row in range(board.n2):
-            # Counts how many cells have option (i + 1) [i is index] as a legal option.
-            options_count = [0 for i in range(board.n2)]
+class SolveResult:
+    def __init__(self, technique_names=()):
+        # Whether the board was solved, and whether the search was cut short by max_depth, max_nodes or max_seconds (in which case an unsolved board may still have a solution).
+        self.solved = False
+        self.exhausted = False
 
-            # Maps an option to the a celli that has it as a legal option.
-            cell_for_option = {}
+        # The number of guesses made, the number of cells they were made on, the number of guesses that led to a contradiction, and the most guesses that were stacked on top of each other.
+        self.nodes = 0
+        self.branches = 0
+        self.backtracks = 0
+        self.max_depth = 0
 
-            # Count options for all cells in row.
-            for col in range(board.n2):
-                cell = (row, col)
+        # A mapping from how a cell was filled in ('naked_single', 'hidden_single' or 'guess') to the number of cells filled in that way, counting cells again every time they are filled in after a backtrack.
+        self.placements = {'naked_single': 0, 'hidden_single': 0, 'guess': 0}
 
-                if cell in board.unsolved_cells:
-                    for index, is_legal in enumerate(board.get_options(cell)):
-                        if is_legal:
-                            options_count[index] += 1
-                            cell_for_option[index + 1] = cell
+        # A mapping from what eliminated options ('singles' for the peers of every filled in cell, or a technique name) to the number of options it eliminated.
+        self.eliminations = dict.fromkeys(['singles'] + list(technique_names), 0)
 
-            # If you find an option that only had one cell as its possible location, make a move there.
-            for index, count in enumerate(options_count):
-                if count == 1:
-                    certain_cell = cell_for_option[index + 1]
-                    filled_cells.add(certain_cell)
-                    board.make_move(certain_cell, index + 1)
+        # The number of changes made to the board: every placement and every elimination, however it was made.
+        self.changes = 0
 
-        return filled_cells
+        # The seconds spent on the first deduction, on the search after it, and on both.
+        self.propagate_seconds = 0.0
+        self.search_seconds = 0.0
+        self.seconds = 0.0
 
-    def deduce_cols(self, board):
-        # A collection of all modified cells.
-        filled_cells = set()
+    # A SolveResult is true if the board was solved, so it can be used where solveBoard returns a bool.
+    def __bool__(self):
+        return self.solved
 
-        for col in range(board.n2):
-            # Counts how many cells have option (i + 1) [i is index] as a legal option.
-            options_count = [0 for i in range(board.n2)]
 
-            # Maps an option to the a cell that has it as a legal option.
-            cell_for_option = {}
+class Solver:
+    def __init__(self, max_depth=None, max_nodes=None, tie_break=None, max_seconds=None, techniques=DEFAULT_TECHNIQUES, max_subset_size=4, max_fish_size=None):
+        # The most guesses that may be stacked on top of each other, the most guesses that may be made in total, and the most seconds that may be spent on one board before the search gives up. None means no limit.
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+
+        # How to choose between equally constrained cells when guessing. See Board.get_most_constrained_cell.
+        self.tie_break = tie_break
+
+        # The names of the Solver methods that are tried, in order, once naked and hidden singles find nothing more. Each is called with the board and the set of rows/cols/boxes (numbered as in board.units) that changed since it last ran.
+        self.technique_names = list(techniques)
+        self.techniques = [getattr(self, name) for name in techniques]
+
+        # The largest naked/hidden subset looked for (2 for pairs, 3 for triples, 4 for quads), and the largest fish (2 for an X-Wing, 3 for a Swordfish, 4 for a Jellyfish, and so on). None means up to n2 / 2, past which every fish has a smaller complement.
+        self.max_subset_size = max_subset_size
+        self.max_fish_size = max_fish_size
+
+        # A mapping from a technique name to [times run, seconds spent, options eliminated] during the last solve (or since reset_stats, for callers of deduce), to tell whether a technique pays for itself.
+        self.technique_stats = {}
+        self.reset_stats()
+
+        # The number of guesses made during the last solve, and the number of cells they were made on (the branching points of the search tree).
+        self.nodes = 0
+        self.branches = 0
+
+        # The seconds the last solve spent on the first deduction, before any guess, and on everything after it.
+        self.propagate_seconds = 0.0
+        self.search_seconds = 0.0
+
+        # Whether the last solve was cut short by max_depth, max_nodes or max_seconds. If so, a False result does not mean the board has no solution.
+        self.exhausted = False
+
+        # The SolveResult being filled in by the current solve, or None if no counters beyond the ones above are being kept.
+        self.result = None
+
+    # Solves a board. Returns whether it was solved, or a SolveResult with the counters of the solve if stats is set.
+    def solveBoard(self, board, stats=False):
+        if not stats:
+            return self.search(board, 1) == 1
+
+        result = SolveResult(self.technique_names)
+        self.result = result
+
+        try:
+            result.solved = self.search(board, 1) == 1
+        finally:
+            self.result = None
+
+        result.exhausted = self.exhausted
+        result.nodes = self.nodes
+        result.branches = self.branches
+        result.placements['guess'] = self.nodes
+
+        # Every pass of the search either guesses on a new cell, finds the solution, or runs into a dead end and backtracks, and there is one pass more than there are guesses.
+        result.backtracks = self.nodes + 1 - self.branches - result.solved
+
+        # Every change that was not a placement was an elimination, and the techniques keep count of their own.
+        for name, (runs, seconds, eliminated) in self.technique_stats.items():
+            result.eliminations[name] = eliminated
+
+        result.eliminations['singles'] = result.changes - sum(result.placements.values()) - sum(result.eliminations.values())
+
+        result.propagate_seconds = self.propagate_seconds
+        result.search_seconds = self.search_seconds
+        result.seconds = self.propagate_seconds + self.search_seconds
+        return result
+
+    # Counts the solutions of a board, stopping as soon as limit of them are found, so the default limit of 2 is enough to tell a proper puzzle from one with many solutions. The board is left as it was given. If the search is cut short by max_depth, max_nodes or max_seconds (see exhausted), the count is only a lower bound.
+    def count_solutions(self, board, limit=2):
+        start = board.checkpoint()
+        num_solutions = self.search(board, limit)
+        board.rollback(start)
+        return num_solutions
+
+    # Checks whether a board has exactly one solution, leaving the board as it was given.
+    def has_unique_solution(self, board):
+        return self.count_solutions(board, 2) == 1
+
+    # Sets the technique_stats of every technique back to zero. search does this for every solve; code that calls deduce on its own can use it to count from a given point.
+    def reset_stats(self):
+        self.technique_stats = {name: [0, 0.0, 0] for name in self.technique_names}
+
+    # Searches for solutions until limit of them are found, and returns how many were found. If the limit is reached, the board is left filled in with the last solution found; otherwise it is rolled back to how it was given to us.
+    def search(self, board, limit):
+        num_solutions = 0
+        self.nodes = 0
+        self.branches = 0
+        self.exhausted = False
+        self.reset_stats()
+        start_time = time.perf_counter()
+        deadline = None if self.max_seconds is None else start_time + self.max_seconds
+
+        # If not enough solutions are found, the board is rolled back to how it was given to us.
+        start = board.checkpoint()
+
+        # Every unsolved cell has to be looked at once before the first guess.
+        board.pending_cells.extend(board.unsolved_cells)
+
+        # The guess stack. Each frame is [cell, bitmask of options not tried yet, checkpoint from before the cell was guessed].
+        stack = []
+
+        # While a SolveResult is being filled in, the changes made by every deduction (and the guess before it) are counted from the length of the trail.
+        result = self.result
+
+        # The first deduction is timed on its own, since on easy boards it is all of the work.
+        deduced = self.deduce(board)
+        self.propagate_seconds = time.perf_counter() - start_time
+
+        if result is not None:
+            result.changes += len(board.trail) - start
+
+        try:
+            while True:
+                # If deduction found a contradiction, there is nothing to guess and we go straight to backtracking.
+                if deduced:
+                    curr_cell = board.get_most_constrained_cell(self.tie_break)
+
+                    if curr_cell is None:
+                        num_solutions += 1
+
+                        # Past the limit, a solution is just another dead end to backtrack out of.
+                        if num_solutions == limit:
+                            return num_solutions
+                    elif self.max_depth is not None and len(stack) >= self.max_depth:
+                        self.exhausted = True
+                    else:
+                        stack.append([curr_cell, board.get_options(curr_cell), board.checkpoint()])
+                        self.branches += 1
 
-            # Count options for all cells in col.
-            for row in range(board.n2):
-                cell = (row, col)
+                        if result is not None and len(stack) > result.max_depth:
+                            result.max_depth = len(stack)
 
-                if cell in board.unsolved_cells:
-                    for index, is_legal in enumerate(board.get_options(cell)):
-                        if is_legal:
-                            options_count[index] += 1
-                            cell_for_option[index + 1] = cell
+                # Find the deepest guess that still has options left, undoing everything done since it was made.
+                while stack:
+                    frame = stack[-1]
+                    board.rollback(frame[2])
 
-            # If you find an option that only had one cell as its possible location, make a move there.
-            for index, count in enumerate(options_count):
-                if count == 1:
-                    certain_cell = cell_for_option[index + 1]
-                    filled_cells.add(certain_cell)
-                    board.make_move(certain_cell, index + 1)
+                    if frame[1]:
+                        break
 
-        return filled_cells
+                    stack.pop()
+                else:
+                    board.rollback(start)
+                    return num_solutions
+
+                if (self.max_nodes is not None and self.nodes >= self.max_nodes) or (deadline is not None and time.perf_counter() > deadline):
+                    self.exhausted = True
+                    board.rollback(start)
+                    return num_solutions
+
+                # Take the lowest remaining option off of the bitmask and try it.
+                options = frame[1]
+                bit = options & -options
+                frame[1] = options ^ bit
+                self.nodes += 1
+                board.make_move(frame[0], bit.bit_length())
+                deduced = self.deduce(board)
+
+                if result is not None:
+                    result.changes += len(board.trail) - frame[2]
+        finally:
+            self.search_seconds = time.perf_counter() - start_time - self.propagate_seconds
+
+    # Does logical deduction until no more can be done. Only the cells on the board's work queue are looked at: a cell left with one option is filled in (a naked single), and the row/col/box of every changed cell is searched for hidden singles. When singles stall, the other techniques are tried in order on the rows/cols/boxes that changed, going back to singles as soon as one of them eliminates an option. Returns False if the board turns out to have no solution.
+    def deduce(self, board):
+        pending_cells = board.pending_cells
+        values = board.values
+        legal_options = board.legal_options
+        units = board.units
+        units_of = board.units_of
+        techniques = self.techniques
+        result = self.result
+
+        # The rows/cols/boxes that have to be searched for hidden singles.
+        pending_units = set()
+
+        # Every row/col/box that changed during this deduction, in order, and how far into that list each technique has already looked.
+        changed_units = []
+        looked_at = [0 for technique in techniques]
+
+        while True:
+            while pending_cells:
+                cell = pending_cells.pop()
+
+                if not values[cell]:
+                    options = legal_options[cell]
+
+                    if not options:
+                        return False
+
+                    # A single option is a power of two. Filling the cell puts it back on the queue.
+                    if not options & (options - 1):
+                        board.make_move(cell, options.bit_length())
+
+                        if result is not None:
+                            result.placements['naked_single'] += 1
+
+                        continue
+
+                pending_units.update(units_of[cell])
+
+                if techniques:
+                    changed_units.extend(units_of[cell])
+
+            if pending_units:
+                if not self.deduce_section(board, units[pending_units.pop()]):
+                    return False
+
+                continue
+
+            for i, technique in enumerate(techniques):
+                if looked_at[i] < len(changed_units):
+                    changed = set(changed_units[looked_at[i]:])
+                    looked_at[i] = len(changed_units)
+
+                    # Techniques only eliminate options, so everything they add to the trail is an elimination.
+                    start_time = time.perf_counter()
+                    start_trail = len(board.trail)
+                    technique(board, changed)
+
+                    stats = self.technique_stats[self.technique_names[i]]
+                    stats[0] += 1
+                    stats[1] += time.perf_counter() - start_time
+                    stats[2] += len(board.trail) - start_trail
+
+                    if pending_cells:
+                        break
+            else:
+                return True
 
+    # Fills in every option that only one cell in a given row/col/box can hold. Returns False if some value can no longer go anywhere in the section.
+    def deduce_section(self, board, cells):
+        values = board.values
+        legal_options = board.legal_options
 
-    def deduce_boxes(self, board):
-        # A collection of all filled cells.
-        filled_cells = set()
+        # Bitmasks of the options that at least one/at least two cells in the section have as a legal option, and of the values already filled in.
+        seen_once = 0
+        seen_twice = 0
+        filled = 0
 
-        for box_num in range(board.n2):
-            # Counts how many cells have option (i + 1) [i is index] as a legal option.
-            options_count = [0 for i in range(board.n2)]
+        for cell in cells:
+            if values[cell]:
+                filled |= 1 << (values[cell] - 1)
+            else:
+                options = legal_options[cell]
+                seen_twice |= seen_once & options
+                seen_once |= options
+
+        if seen_once | filled != board.all_options:
+            return False
 
-            # Maps an option to the a a cell that has it as a legal option.
-            cell_for_option = {}
+        # If you find an option that only had one cell as its possible location, make a move there.
+        singles = seen_once & ~seen_twice
+
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+
+            for cell in cells:
+                if not values[cell] and legal_options[cell] & bit:
+                    board.make_move(cell, bit.bit_length())
+
+                    if self.result is not None:
+                        self.result.placements['hidden_single'] += 1
+
+                    break
+
+        return True
+
+
+
+    # Looks for values that can only go where a box and a row/col cross (locked candidates). If the cells of a box that can hold a value are all in one row/col, the value is eliminated from the rest of that row/col (pointing). If the cells of a row/col that can hold a value are all in one box, the value is eliminated from the rest of that box (claiming).
+    def locked_candidates(self, board, changed):
+        n = board.n
+        n2 = board.n2
+        values = board.values
+        legal_options = board.legal_options
+
+        for unit in changed:
+            cells = board.units[unit]
 
-            # Count options for all cells in box.
-            for cell in board.get_box(box_num):
-                if cell in board.unsolved_cells:
-                    for index, is_legal in enumerate(board.get_options(cell)):
-                        if is_legal:
-                            options_count[index] += 1
-                            cell_for_option[index + 1] = cell
+            if unit >= 2 * n2:
+                box = unit - 2 * n2
+
+                # The options of the open cells of every row/col of the box. The cells of a box are in row-major order.
+                box_rows = [0 for i in range(n)]
+                box_cols = [0 for i in range(n)]
 
-            # If you find an option that only had one cell as its possible location, make a move there.
-            for index, count in enumerate(options_count):
-                if count == 1:
-                    certain_cell = cell_for_option[index + 1]
-                    filled_cells.add(certain_cell)
-                    board.make_move(certain_cell, index + 1)
+                for i, cell in enumerate(cells):
+                    if not values[cell]:
+                        box_rows[i // n] |= legal_options[cell]
+                        box_cols[i % n] |= legal_options[cell]
 
+                for i, pointing in enumerate(get_exclusive_bits(box_rows)):
+                    if pointing:
+                        for cell in board.get_row(board.row_of[cells[i * n]]):
+                            if board.box_of[cell] != box and not values[cell]:
+                                board.eliminate(cell, pointing)
 
-        return filled_cells
+                for i, pointing in enumerate(get_exclusive_bits(box_cols)):
+                    if pointing:
+                        for cell in board.get_col(board.col_of[cells[i]]):
+                            if board.box_of[cell] != box and not values[cell]:
+                                board.eliminate(cell, pointing)
+            else:
+                # The options of the open cells of the row/col in every box it crosses. The cells of a row/col are in order, n to a box.
+                segments = [0 for i in range(n)]
 
+                for i, cell in enumerate(cells):
+                    if not values[cell]:
+                        segments[i // n] |= legal_options[cell]
 
-    def find_singles(self, board):
-        filled_cells = set()
+                for i, claiming in enumerate(get_exclusive_bits(segments)):
+                    if claiming:
+                        for cell in board.get_box(board.box_of[cells[i * n]]):
+                            if cell not in cells[i * n:(i + 1) * n] and not values[cell]:
+                                board.eliminate(cell, claiming)
 
-        unsolved_cells = board.unsolved_cells.copy()
+    # Looks for fish: for one value, k rows whose open places for the value all fall in the same k cols (or the other way around). The value has to go in those k cols within those k rows, so it is eliminated from the rest of the k cols. k = 2 is an X-Wing, 3 a Swordfish and 4 a Jellyfish. Any change can create a fish anywhere, so every value is checked whenever something changed.
+    def fish(self, board, changed):
+        n2 = board.n2
+        values = board.values
+        legal_options = board.legal_options
+        max_size = n2 // 2 if self.max_fish_size is None else min(self.max_fish_size, n2 // 2)
 
-        for cell in unsolved_cells:
-            num_options = board.options_count[cell]
+        for bit in (1 << i for i in range(n2)):
+            for lines, crossing in ((board.cells_in_rows, board.cells_in_cols), (board.cells_in_cols, board.cells_in_rows)):
+                # A mapping from a line to a bitmask of the positions along it (the crossing lines) where the value can go.
+                places = [0 for i in range(n2)]
 
-            if num_options == 1:
-                for index, is_legal in enumerate(board.get_options(cell)):
-                    if is_legal:
-                        board.make_move(cell, index + 1)
-                        filled_cells.add(cell)
-                        break
+                for line, cells in enumerate(lines):
+                    for position, cell in enumerate(cells):
+                        if not values[cell] and legal_options[cell] & bit:
+                            places[line] |= 1 << position
+
+                for group, positions in find_locked_sets(places, max_size):
+                    while positions:
+                        position = positions & -positions
+                        positions ^= position
 
-        return filled_cells
+                        # The crossing line's cells are in the same order as the lines, so a cell's position along it is its line number.
+                        for line, cell in enumerate(crossing[position.bit_length() - 1]):
+                            if line not in group and not values[cell]:
+                                board.eliminate(cell, bit)
+
+    # Looks for n cells in a row/col/box whose options, together, are only n values (a naked pair/triple/quad). Those values have to go in those cells, so they are eliminated from the rest of the section.
+    def naked_subsets(self, board, changed):
+        values = board.values
+        legal_options = board.legal_options
+
+        for unit in changed:
+            cells = [cell for cell in board.units[unit] if not values[cell]]
+            max_size = min(self.max_subset_size, len(cells) // 2)
+
+            if max_size < 2:
+                continue
+
+            for group, union in find_locked_sets([legal_options[cell] for cell in cells], max_size):
+                for i, cell in enumerate(cells):
+                    if i not in group:
+                        board.eliminate(cell, union)
+
+    # Looks for n values that, together, only n cells in a row/col/box can hold (a hidden pair/triple/quad). Those cells have to hold those values, so every other option is eliminated from them.
+    def hidden_subsets(self, board, changed):
+        values = board.values
+        legal_options = board.legal_options
+
+        for unit in changed:
+            cells = [cell for cell in board.units[unit] if not values[cell]]
+            max_size = min(self.max_subset_size, len(cells) // 2)
+
+            if max_size < 2:
+                continue
+
+            # A mapping from a value (bit index) to a bitmask of the positions in cells that can hold it.
+            places = [0 for i in range(board.n2)]
+
+            for position, cell in enumerate(cells):
+                options = legal_options[cell]
+
+                while options:
+                    bit = options & -options
+                    options ^= bit
+                    places[bit.bit_length() - 1] |= 1 << position
+
+            for group, positions in find_locked_sets(places, max_size):
+                keep = 0
+
+                for index in group:
+                    keep |= 1 << index
+
+                while positions:
+                    bit = positions & -positions
+                    positions ^= bit
+                    board.eliminate(cells[bit.bit_length() - 1], ~keep & board.all_options)
 
 
 
 def test_board(board):
     for row in range(board.n2):
         vals = [0 for i in range(board.n2)]
-        for col in range(board.n2):
-            cell = (row, col)
-            vals[board.board[cell] - 1] += 1
-            if vals[board.board[cell] - 1] > 1:
+        for cell in board.get_row(row):
+            vals[board.values[cell] - 1] += 1
+            if vals[board.values[cell] - 1] > 1:
                 print("Error in row @ %s" % str(cell))
                 return
 
     for col in range(board.n2):
         vals = [0 for i in range(board.n2)]
-        for row in range(board.n2):
-            cell = (row, col)
-            vals[board.board[cell] - 1] += 1
-            if vals[board.board[cell] - 1] > 1:
+        for cell in board.get_col(col):
+            vals[board.values[cell] - 1] += 1
+            if vals[board.values[cell] - 1] > 1:
                 print("Error in col @ %s" % str(cell))
                 return
 
     for box_num in range(board.n2):
         vals = [0 for i in range(board.n2)]
-        first_row = (box_num // board.n) * board.n
-        first_col = (box_num % board.n) * board.n
-
-        for i in range(board.n2):
-            cell = (first_row + i // board.n, first_col + i % board.n)
-            vals[board.board[cell] - 1] += 1
-            if vals[board.board[cell] - 1] > 1:
+        for cell in board.get_box(box_num):
+            vals[board.values[cell] - 1] += 1
+            if vals[board.values[cell] - 1] > 1:
                 print("Error in box @ %s" % str(cell))
                 return
 
@@ -445,3 +885,6 @@ if __name__ == "__main__":
     #s.solveBoard(board)
     cProfile.run("s.solveBoard(board)", sort="tottime")
     board.print()
+
+    for name, (runs, seconds, eliminated) in s.technique_stats.items():
+        print("%-20s %5i runs %9.3fms %6i eliminated" % (name, runs, seconds * 1000, eliminated))
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import time
+
+import a2
+import corpus
+
+
+# Finds every board in the given files and directories. Directories are searched recursively for .csv boards, in sorted order, and every board of a packed (.sdk) file is included. Yields (path, index, name) tuples, where index is the board number in a packed file (None for a csv file) and name is the path that a solution should be saved under: a board found in directory tests/test-3-hard is named test-3-hard/00.csv, the same way cp -r would copy it.
+def find_boards(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            parent = os.path.dirname(os.path.normpath(path))
+
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+
+                for filename in sorted(filenames):
+                    if filename.endswith('.csv'):
+                        board_path = os.path.join(dirpath, filename)
+                        yield board_path, None, os.path.relpath(board_path, parent)
+        elif path.endswith(corpus.EXTENSION):
+            prefix = os.path.basename(path)[:-len(corpus.EXTENSION)]
+
+            with corpus.Corpus(path) as boards:
+                for index in range(len(boards)):
+                    yield path, index, boards.get_name(index) or '%s/%i.csv' % (prefix, index)
+        else:
+            yield path, None, os.path.basename(path)
+
+
+# The packed files opened by load_board, so that each one is only mapped once per process.
+open_corpora = {}
+
+# Loads a board found by find_boards.
+def load_board(path, index):
+    if index is None:
+        return a2.Board(path)
+
+    boards = open_corpora.get(path)
+
+    if boards is None:
+        boards = corpus.Corpus(path)
+        open_corpora[path] = boards
+
+    return boards.get_board(index)
+
+
+# Solves one board with the given solver and saves it to out_dir if it was solved. Returns (name, status, seconds), where status is 'solved', 'unsolved' (the board has no solution) or 'timeout' (the solver gave up).
+def solve_board(solver, path, index, name, out_dir=None):
+    start = time.perf_counter()
+    board = load_board(path, index)
+    solved = solver.solveBoard(board)
+    seconds = time.perf_counter() - start
+
+    if solved and out_dir is not None:
+        out_path = os.path.join(out_dir, name)
+        os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+        board.save_sudoku(out_path)
+
+    if solved:
+        return name, 'solved', seconds
+    elif solver.exhausted:
+        return name, 'timeout', seconds
+    else:
+        return name, 'unsolved', seconds
+
+
+# Solves every board in the given files and directories with one reused solver, yielding (name, status, seconds) as each board is finished (see solve_board). If out_dir is given, every solved board is saved there under its name as soon as it is solved. A board is given up on after timeout seconds of searching.
+def solve_boards(paths, out_dir=None, timeout=None):
+    solver = a2.Solver(max_seconds=timeout)
+
+    for path, index, name in find_boards(paths):
+        yield solve_board(solver, path, index, name, out_dir)
+
+
+# The solver reused by every task that runs in a pool worker process.
+worker_solver = None
+
+def init_worker(timeout):
+    global worker_solver
+    worker_solver = a2.Solver(max_seconds=timeout)
+
+def solve_task(task):
+    return solve_board(worker_solver, *task)
+
+
+# The same as solve_boards, but the boards are spread over a pool of worker processes (os.cpu_count() by default), chunksize boards at a time, and yielded in the order they finish. The timeout is enforced by the solver inside each worker, so a slow board only holds up its own worker.
+def solve_boards_parallel(paths, out_dir=None, timeout=None, workers=None, chunksize=4):
+    tasks = [(path, index, name, out_dir) for path, index, name in find_boards(paths)]
+
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(timeout,)) as pool:
+        for result in pool.imap_unordered(solve_task, tasks, chunksize):
+            yield result
+
+
+# Formats a throughput summary for a finished batch.
+def summarize(num_boards, num_solved, seconds):
+    rate = num_boards / seconds if seconds > 0 else float('inf')
+    return 'Solved %d/%d boards in %.3fs (%.1f boards/s)' % (num_solved, num_boards, seconds, rate)
@@ -0,0 +1,182 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import a2
+
+''' Solves many boards at once by running naked and hidden singles on all of them together with NumPy, instead of one board at a time through a2.Board and a2.Solver.
+
+The candidates of a batch of N boards are one (N, cells) array of bitmasks, just like Board.legal_options (bit v - 1 is set if v can still go in the cell), so a 9x9 board takes 81 uint16s instead of 81 * 9 booleans and most steps are bit operations on whole arrays. A round of deduction works on every board at once:
+- Naked singles: the cells with one candidate left are placed, and their values are eliminated from the rest of every row/col/box they are in.
+- Hidden singles: a value that only one cell of a row/col/box can still hold is placed in that cell.
+- A cell with no candidates, a value with nowhere to go in some row/col/box, or the same value placed twice in one is a contradiction, which proves that the board has no solution.
+Rounds are repeated on the boards that are still changing until none are. Boards that are solved by then (the bulk of easy traffic) never turn into a Board object at all; the ones that stall are handed to a2.Solver with everything that singles found filled in.
+
+Boards are processed batch_size at a time to bound memory. NumPy is optional: without it, solve_batch falls back to a2.Solver for every board.
+'''
+
+# The rows/cols/boxes of every board size as NumPy arrays, created when a size is first seen: a (3 * n2, n2) array of the cells of every unit, and a (cells, 3) array of the units of every cell.
+unit_arrays = {}
+
+
+# Gets the NumPy unit arrays for n x n boxes.
+def get_unit_arrays(n):
+    arrays = unit_arrays.get(n)
+
+    if arrays is None:
+        layout = a2.get_layout(n)
+        arrays = (np.array(layout.units), np.array(layout.units_of))
+        unit_arrays[n] = arrays
+
+    return arrays
+
+
+# Gets the smallest unsigned integer type that holds a bitmask of n2 options.
+def get_mask_type(n2):
+    for mask_type in (np.uint16, np.uint32, np.uint64):
+        if n2 <= np.iinfo(mask_type).bits:
+            return mask_type
+
+    raise ValueError('%ix%i boards are too big to be batched.' % (n2, n2))
+
+
+# Builds the candidate array of a batch of boards of one size, given as a (N, cells) array of cell values.
+def get_candidates(values, n2):
+    mask_type = get_mask_type(n2)
+    bits = np.left_shift(mask_type(1), np.maximum(values, 1).astype(mask_type) - mask_type(1))
+    return np.where(values > 0, bits, mask_type((1 << n2) - 1))
+
+
+# Finds the bits that are set in at least one and in at least two of the masks along the last axis of an array.
+def get_seen(masks):
+    seen_once = np.zeros(masks.shape[:-1], dtype=masks.dtype)
+    seen_twice = np.zeros_like(seen_once)
+
+    for i in range(masks.shape[-1]):
+        seen_twice |= seen_once & masks[..., i]
+        seen_once |= masks[..., i]
+
+    return seen_once, seen_twice
+
+
+# Gets the value of every cell of a candidate array: the value of its only candidate, or 0 for cells with more than one candidate or none at all.
+def get_values(candidates, n2):
+    values = np.zeros(candidates.shape, dtype=int)
+
+    for value in range(1, n2 + 1):
+        values[candidates == candidates.dtype.type(1 << (value - 1))] = value
+
+    return values
+
+
+# Runs naked and hidden singles on a candidate array until no board changes any more, updating it in place. Returns a boolean array of the boards that are not known to have no solution.
+def propagate(candidates, n):
+    n2 = n * n
+    num_boards, num_cells = candidates.shape
+    units, units_of = get_unit_arrays(n)
+    all_options = candidates.dtype.type((1 << n2) - 1)
+    consistent = np.ones(num_boards, dtype=bool)
+
+    # The boards that changed in the last round, which are the only ones that can change in the next.
+    active = np.arange(num_boards)
+
+    while len(active):
+        old = candidates[active]
+
+        # Naked singles: remove the value of every cell with one candidate left from the other cells of its rows/cols/boxes. A single option is a power of two (empty cells pass too, and are caught below).
+        single = (old & (old - 1)) == 0
+        used, used_twice = get_seen(np.where(single, old, 0)[:, units])
+        failed = (used_twice != 0).any(axis=1)
+        used_by_peers = used[:, units_of]
+        new = np.where(single, old, old & ~(used_by_peers[:, :, 0] | used_by_peers[:, :, 1] | used_by_peers[:, :, 2]))
+
+        # Hidden singles: place every value that only one cell of a row/col/box can hold. Rows, cols and boxes each cover every cell once, so each kind can be scattered back onto the cells directly.
+        in_units = new[:, units]
+        seen_once, seen_twice = get_seen(in_units)
+        failed |= (seen_once != all_options).any(axis=1)
+        hidden_in_units = in_units & (seen_once & ~seen_twice)[:, :, None]
+        hidden = np.zeros_like(new)
+
+        for kind in range(3):
+            kind_units = slice(kind * n2, (kind + 1) * n2)
+            hidden[:, units[kind_units].ravel()] |= hidden_in_units[:, kind_units].reshape(len(active), num_cells)
+
+        failed |= ((hidden & (hidden - 1)) != 0).any(axis=1)
+        new = np.where(hidden != 0, hidden, new)
+        failed |= (new == 0).any(axis=1)
+
+        candidates[active] = new
+        consistent[active[failed]] = False
+        active = active[~failed & (new != old).any(axis=1)]
+
+    return consistent
+
+
+# Solves a list of boards of one size, given as row-major lists of cell values. Returns a list with the solved values of every board, or None for boards without a solution (or that the solver gave up on).
+def solve_same_size(puzzles, solver, batch_size):
+    n2 = math.isqrt(len(puzzles[0]))
+    n = math.isqrt(n2)
+    solutions = []
+
+    for start in range(0, len(puzzles), batch_size):
+        candidates = get_candidates(np.array(puzzles[start:start + batch_size]), n2)
+        consistent = propagate(candidates, n)
+        values = get_values(candidates, n2)
+        solved = consistent & (values > 0).all(axis=1)
+
+        for b in range(len(candidates)):
+            if solved[b]:
+                solutions.append(values[b].tolist())
+            elif not consistent[b]:
+                solutions.append(None)
+            else:
+                board = a2.Board()
+                board.load_values(values[b].tolist())
+                solutions.append(board.values if solver.solveBoard(board) else None)
+
+    return solutions
+
+
+# Solves a list of boards, given as row-major lists of cell values, in batches of boards of the same size. Returns a list with the solved values of every board in the same order, or None for boards without a solution. Boards that singles cannot finish are solved with the given a2.Solver.
+def solve_batch(puzzles, solver=None, batch_size=4096):
+    if solver is None:
+        solver = a2.Solver()
+
+    solutions = [None] * len(puzzles)
+
+    if np is None:
+        for i, values in enumerate(puzzles):
+            board = a2.Board()
+            board.load_values(list(values))
+
+            if solver.solveBoard(board):
+                solutions[i] = board.values
+
+        return solutions
+
+    indices_by_size = {}
+
+    for i, values in enumerate(puzzles):
+        indices_by_size.setdefault(len(values), []).append(i)
+
+    for indices in indices_by_size.values():
+        for i, solution in zip(indices, solve_same_size([puzzles[i] for i in indices], solver, batch_size)):
+            solutions[i] = solution
+
+    return solutions
+
+
+if __name__ == "__main__":
+    import glob
+    import time
+
+    # change this to the boards that you'd like to test
+    puzzles = [a2.read_sudoku(path) for path in sorted(glob.glob('tests/test-1-easy/*.csv'))] * 10
+
+    start = time.perf_counter()
+    solutions = solve_batch(puzzles)
+    seconds = time.perf_counter() - start
+    print('Solved %i of %i boards in %.3fs (%.0f boards/s)' % (sum(1 for solution in solutions if solution), len(puzzles), seconds, len(puzzles) / seconds))
@@ -0,0 +1,210 @@
+#!/usr/bin/python3
+
+# Benchmarks solver modules on the test boards and writes the raw times and their statistics as JSON. Run it from the repository root:
+#
+#   python benchmark.py a2 --out results.json
+#   python benchmark.py a2 combined_deduce --dirs test-1-easy test-2-medium --reps 10 --warmup 2
+#
+# Any module with a Board(path) class and a Solver() class with solveBoard(board) can be benchmarked.
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import a2
+
+''' contest_benchmark.py prints rounded milliseconds for people to read, which process_results.py and compare_results.py then have to scrape back with regexes. This runner keeps every sample instead:
+- Every board is solved warmup times untimed (to fill caches and layouts), then reps times with time.perf_counter.
+- The JSON output has the raw samples of every board in milliseconds, as floats, with their mean/median/stddev/min/max, and per test folder the same statistics plus percentiles over the per-board means.
+- For modules that allow it, the time of every solve is also split into phases, with their own samples and statistics: parse and init (Board.load_values) for the board, and propagate and search for solvers that record propagate_seconds/search_seconds like a2.Solver. A slowdown can then be pinned on I/O, setup, deduction or guessing.
+- The machine, Python and git commit the numbers came from are recorded with them, so results from CI can be compared with some idea of where they came from.
+'''
+
+# The percentiles reported for every test folder.
+PERCENTILES = (50, 90, 95, 99)
+
+
+class BoardTimeout(Exception):
+    pass
+
+
+# Gets the platform, Python and repository details that a set of results was measured with.
+def get_machine_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'git_commit': commit,
+    }
+
+
+# Gets the statistics of a list of times in ms. Percentiles are only given for more than one time.
+def get_stats(times, percentiles=()):
+    stats = {
+        'count': len(times),
+        'total_ms': sum(times),
+        'mean_ms': statistics.mean(times),
+        'median_ms': statistics.median(times),
+        'stdev_ms': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min_ms': min(times),
+        'max_ms': max(times),
+    }
+
+    if percentiles and len(times) > 1:
+        cuts = statistics.quantiles(times, n=100, method='inclusive')
+
+        for percentile in percentiles:
+            stats['p%i_ms' % percentile] = cuts[percentile - 1]
+
+    return stats
+
+
+# Solves a board once with a module. Returns the total time taken in ms, and a mapping from phase to ms for the phases the module lets us time on their own: parse (reading the csv) and init (setting up the candidates) for boards with load_values, and propagate (the first deduction) and search (everything after it) for solvers that time them. Raises BoardTimeout if it takes more than timeout seconds (on systems with SIGALRM).
+def time_board(module, path, timeout=None):
+    use_alarm = timeout is not None and hasattr(signal, 'SIGALRM')
+
+    if use_alarm:
+        def handle_alarm(signum, frame):
+            raise BoardTimeout()
+
+        signal.signal(signal.SIGALRM, handle_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        phases = {}
+        start = time.perf_counter()
+
+        if hasattr(module.Board, 'load_values'):
+            values = getattr(module, 'read_sudoku', a2.read_sudoku)(path)
+            parsed = time.perf_counter()
+            board = module.Board()
+            board.load_values(values)
+            loaded = time.perf_counter()
+            phases['parse'] = (parsed - start) * 1000
+            phases['init'] = (loaded - parsed) * 1000
+        else:
+            board = module.Board(path)
+
+        solver = module.Solver()
+        solver.solveBoard(board)
+        total = (time.perf_counter() - start) * 1000
+
+        if hasattr(solver, 'search_seconds'):
+            phases['propagate'] = solver.propagate_seconds * 1000
+            phases['search'] = solver.search_seconds * 1000
+
+        return total, phases
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# Benchmarks a module on every csv board in a test folder. Returns the results of the folder as a dict. Boards that time out or raise an error are marked as such, and left out of the folder statistics.
+def run_test_dir(module, test_dir, reps, warmup, timeout=None):
+    boards = []
+
+    for test in sorted(os.listdir(os.path.join('tests', test_dir))):
+        if not test.endswith('.csv'):
+            continue
+
+        path = os.path.join('tests', test_dir, test)
+        result = {'name': test, 'status': 'ok', 'samples_ms': [], 'phase_samples_ms': {}}
+
+        try:
+            for _ in range(warmup):
+                time_board(module, path, timeout)
+
+            for _ in range(reps):
+                total, phases = time_board(module, path, timeout)
+                result['samples_ms'].append(total)
+
+                for phase, ms in phases.items():
+                    result['phase_samples_ms'].setdefault(phase, []).append(ms)
+        except BoardTimeout:
+            result['status'] = 'timeout'
+        except Exception as err:
+            # A module that crashes on one board should not lose the results of the others.
+            result['status'] = 'error'
+            result['error'] = repr(err)
+
+        if result['samples_ms']:
+            result.update(get_stats(result['samples_ms']))
+            result['phase_mean_ms'] = {phase: statistics.mean(samples) for phase, samples in result['phase_samples_ms'].items()}
+
+        boards.append(result)
+
+    results = {'module': module.__name__, 'test_dir': test_dir, 'boards': boards}
+    solved = [board for board in boards if board['status'] == 'ok']
+
+    if solved:
+        results['summary'] = get_stats([board['mean_ms'] for board in solved], PERCENTILES)
+        results['phase_summary'] = {phase: get_stats([board['phase_mean_ms'][phase] for board in solved], PERCENTILES) for phase in solved[0]['phase_mean_ms']}
+
+    results['timeouts'] = sum(1 for board in boards if board['status'] == 'timeout')
+    results['errors'] = sum(1 for board in boards if board['status'] == 'error')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark solver modules on the test boards and write the results as JSON.')
+    parser.add_argument('modules', nargs='+', help='modules with Board and Solver classes, e.g. a2 or combined_deduce')
+    parser.add_argument('--dirs', nargs='+', help='folders under tests/ to run (default all)')
+    parser.add_argument('--reps', type=int, default=5, help='timed solves of every board (default 5)')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed solves of every board before the timed ones (default 1)')
+    parser.add_argument('--timeout', type=float, help='seconds a single solve may take before the board is marked as a timeout')
+    parser.add_argument('--out', help='file to write the JSON results to (default stdout)')
+    args = parser.parse_args(argv)
+
+    test_dirs = args.dirs or sorted(name for name in os.listdir('tests') if os.path.isdir(os.path.join('tests', name)))
+    results = {
+        'machine': get_machine_info(),
+        'settings': {'reps': args.reps, 'warmup': args.warmup, 'timeout': args.timeout},
+        'results': [],
+    }
+
+    for name in args.modules:
+        module = importlib.import_module(name)
+
+        for test_dir in test_dirs:
+            test_results = run_test_dir(module, test_dir, args.reps, args.warmup, args.timeout)
+            results['results'].append(test_results)
+
+            # Progress goes to stderr so that stdout is only the JSON.
+            summary = test_results.get('summary')
+
+            if summary is None:
+                print('%-20s %-20s no board was solved: %i timeouts, %i errors' % (name, test_dir, test_results['timeouts'], test_results['errors']), file=sys.stderr)
+            else:
+                phases = ''.join('  %s %.3fms' % (phase, stats['mean_ms']) for phase, stats in test_results['phase_summary'].items())
+                print('%-20s %-20s mean %9.3fms  median %9.3fms  p95 %9.3fms  %i timeouts, %i errors%s' % (name, test_dir, summary['mean_ms'], summary['median_ms'], summary.get('p95_ms', summary['max_ms']), test_results['timeouts'], test_results['errors'], phases), file=sys.stderr)
+
+    if args.out is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, 'w') as out_file:
+            json.dump(results, out_file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
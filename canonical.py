@@ -0,0 +1,212 @@
+import math
+from collections import OrderedDict
+
+import a2
+
+''' Recognises boards that are the same puzzle in disguise, so a repeat can reuse a solution instead of searching again.
+
+Relabelling the digits, swapping rows within a band, swapping whole bands, doing the same to cols and stacks, and transposing all turn a board into another board with the same solutions (transformed the same way). canonicalize() picks one representative board for each family of such boards and returns it with the Transform that leads from the board to it, and Solver keeps the solutions of recent representatives in an LRU cache.
+
+The representative is found by colour refinement instead of by trying every one of the millions of transforms: every row, col, band, stack and digit gets a colour from what it holds (e.g. a row's colour is built from the colours of the cols and digits of its givens), and the colours are refined until they stop splitting. Colours only depend on the shape of the puzzle, so sorting the lines by colour and then numbering the digits in order of first appearance gives the same board for every disguise. Lines that end up with the same colour are kept in their original order, which in rare cases can give two disguises of one puzzle different representatives. That only costs a cache miss: a hit always comes from the exact same representative, so the remapped solution is always right.
+'''
+
+# Board is re-exported for benchmark.py/contest_benchmark.py.
+Board = a2.Board
+
+
+class Transform:
+    def __init__(self, n, transpose, rows, cols, digits):
+        self.n = n
+        self.n2 = n * n
+
+        # Whether the board is transposed before the rows and cols are reordered.
+        self.transpose = transpose
+
+        # Row/col i of the canonical board is row/col rows[i]/cols[i] of the (transposed) board.
+        self.rows = rows
+        self.cols = cols
+
+        # A mapping from a digit of the board to its digit in the canonical board (digits[0] == 0 for empty cells).
+        self.digits = digits
+
+        self.inverse_digits = [0] * (self.n2 + 1)
+
+        for digit, canonical_digit in enumerate(digits):
+            self.inverse_digits[canonical_digit] = digit
+
+    # Gets the cell of the board that a cell of the canonical board comes from.
+    def get_source_cell(self, cell):
+        row = self.rows[cell // self.n2]
+        col = self.cols[cell % self.n2]
+
+        if self.transpose:
+            row, col = col, row
+
+        return row * self.n2 + col
+
+    # Transforms a row-major list of cell values of the board into the canonical board.
+    def apply(self, values):
+        return [self.digits[values[self.get_source_cell(cell)]] for cell in range(len(values))]
+
+    # Transforms a row-major list of cell values of the canonical board (e.g. its solution) back into the board.
+    def invert(self, values):
+        result = [0] * len(values)
+
+        for cell, value in enumerate(values):
+            result[self.get_source_cell(cell)] = self.inverse_digits[value]
+
+        return result
+
+
+# Ranks signatures so that equal signatures get the same small colour and the colours sort like the signatures.
+def rank(signatures):
+    colours = {signature: colour for colour, signature in enumerate(sorted(set(signatures)))}
+    return [colours[signature] for signature in signatures]
+
+
+# Gets the colours of the lines (all rows, then all cols), the groups (all bands, then all stacks) and the digits of a board. Rows and cols are coloured together, and so are bands and stacks, so that the colours do not change when the board is transposed.
+def get_colours(n, givens):
+    n2 = n * n
+    line_colours = [0] * (2 * n2)
+    group_colours = [0] * (2 * n)
+    digit_colours = [0] * (n2 + 1)
+    num_colours = 0
+
+    in_lines = [[] for _ in range(2 * n2)]
+    in_digits = [[] for _ in range(n2 + 1)]
+
+    for row, col, digit in givens:
+        in_lines[row].append((n2 + col, digit))
+        in_lines[n2 + col].append((row, digit))
+        in_digits[digit].append((row, n2 + col))
+
+    while True:
+        line_colours = rank([(line_colours[line], group_colours[line % n2 // n + (line >= n2) * n], tuple(sorted((line_colours[other], digit_colours[digit]) for other, digit in in_lines[line]))) for line in range(2 * n2)])
+        group_colours = rank([(group_colours[group], tuple(sorted(line_colours[(group >= n) * n2 + group % n * n + i] for i in range(n)))) for group in range(2 * n)])
+        digit_colours = rank([(digit_colours[digit], tuple(sorted(tuple(sorted((line_colours[row], line_colours[col]))) for row, col in in_digits[digit]))) for digit in range(n2 + 1)])
+
+        # Refinement only ever splits colours, so it is done once the number of colours stops growing.
+        total = len(set(line_colours)) + len(set(group_colours)) + len(set(digit_colours))
+
+        if total == num_colours:
+            return line_colours, group_colours
+
+        num_colours = total
+
+
+# Gets the canonical board and the Transform leading to it, for a row-major list of cell values.
+def canonicalize_values(values):
+    n = math.isqrt(math.isqrt(len(values)))
+    n2 = n * n
+    givens = [(cell // n2, cell % n2, value) for cell, value in enumerate(values) if value]
+    line_colours, group_colours = get_colours(n, givens)
+    best = None
+
+    for transpose in (False, True):
+        # With the board transposed, its rows are the original cols and the other way around.
+        row_offset, col_offset = (n2, 0) if transpose else (0, n2)
+        row_group_offset, col_group_offset = (n, 0) if transpose else (0, n)
+
+        rows = [band * n + i for band in sorted(range(n), key=lambda band: group_colours[row_group_offset + band]) for i in sorted(range(n), key=lambda i: line_colours[row_offset + band * n + i])]
+        cols = [stack * n + i for stack in sorted(range(n), key=lambda stack: group_colours[col_group_offset + stack]) for i in sorted(range(n), key=lambda i: line_colours[col_offset + stack * n + i])]
+
+        # Number the digits in order of their first appearance in the reordered board, then number the digits that are not given at all.
+        digits = [0] * (n2 + 1)
+        next_digit = 1
+
+        for row in rows:
+            for col in cols:
+                digit = values[col * n2 + row] if transpose else values[row * n2 + col]
+
+                if digit and not digits[digit]:
+                    digits[digit] = next_digit
+                    next_digit += 1
+
+        for digit in range(1, n2 + 1):
+            if not digits[digit]:
+                digits[digit] = next_digit
+                next_digit += 1
+
+        transform = Transform(n, transpose, rows, cols, digits)
+        canonical = transform.apply(values)
+
+        if best is None or canonical < best[0]:
+            best = (canonical, transform)
+
+    return best
+
+
+# Gets the canonical board of a Board, as a tuple of cell values that can be used as a dict key, and the Transform leading to it.
+def canonicalize(board):
+    canonical, transform = canonicalize_values(board.values)
+    return tuple(canonical), transform
+
+
+class Solver:
+    def __init__(self, solver=None, max_size=10000):
+        # The solver used on a cache miss.
+        self.solver = solver or a2.Solver()
+
+        # A mapping from a canonical board to its canonical solution (None if it has no solution), least recently used first.
+        self.max_size = max_size
+        self.cache = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def solveBoard(self, board):
+        key, transform = canonicalize(board)
+        solution = self.cache.get(key, False)
+
+        if solution is not False:
+            self.hits += 1
+            self.cache.move_to_end(key)
+
+            if solution is None:
+                return False
+
+            solution = transform.invert(solution)
+
+            for cell in list(board.unsolved_cells):
+                board.make_move(cell, solution[cell])
+
+            return True
+
+        self.misses += 1
+        solved = self.solver.solveBoard(board)
+
+        # A board the solver gave up on may still have a solution, so only a finished search is remembered.
+        if solved:
+            self.cache[key] = tuple(transform.apply(board.values))
+        elif not getattr(self.solver, 'exhausted', False):
+            self.cache[key] = None
+
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+        return solved
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # change this to the input file that you'd like to test
+    board = Board('tests/test-6-ridiculous/06.csv')
+    solver = Solver()
+
+    # Solve the board, then a randomly relabelled and transposed copy of it, which should be a cache hit.
+    start = time.perf_counter()
+    solver.solveBoard(board)
+    print('Solved in %.3fs' % (time.perf_counter() - start))
+
+    digits = list(range(1, board.n2 + 1))
+    random.shuffle(digits)
+    values = a2.read_sudoku('tests/test-6-ridiculous/06.csv')
+    copy = Board()
+    copy.load_values([digits[values[col * board.n2 + row] - 1] if values[col * board.n2 + row] else 0 for row in range(board.n2) for col in range(board.n2)])
+
+    start = time.perf_counter()
+    solver.solveBoard(copy)
+    print('Solved the disguised copy in %.3fs (%i hits)' % (time.perf_counter() - start, solver.hits))
+    copy.print()
@@ -28,6 +28,18 @@ if not a2_bonus is None: modules.append(a2_bonus)
 #import a2_alt
 #modules.append(a2_alt)
 
+# The dancing links engine solves the same boards through the same Board/Solver interface.
+import dlx
+modules.append(dlx)
+
+# So does the clause learning SAT engine, which is slower on the easy sets.
+#import sat
+#modules.append(sat)
+
+# And the NumPy candidate cube board, which needs NumPy and only pays off on the 25x25 and 36x36 sets.
+#import cube
+#modules.append(cube)
+
 
 test_dirs = []
 for name in os.listdir('tests/'):
@@ -0,0 +1,155 @@
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import a2
+
+''' A packed binary format for large collections of boards of one size, so that loading a board does not have to parse any text.
+
+A packed file (.sdk) is laid out as:
+- A header: the magic bytes b'SDKB', the format version, n2, the number of bytes per cell (1, or 2 when n2 > 15), the number of boards, and the offset of the names section (0 if there is none). See HEADER.
+- The boards, one after another. Every board is n2 * n2 cells in row-major order, one unsigned little-endian integer per cell, with 0 for an empty cell. Since every board takes the same number of bytes, board i starts at HEADER.size + i * board_size, so any board can be read without touching the others.
+- Optionally, the name of every board (e.g. test-3-hard/00.csv), utf-8 encoded and separated by newlines.
+
+Corpus reads a packed file through mmap, and write_corpus creates one from any source of boards, e.g. the csv files under tests/.
+'''
+
+MAGIC = b'SDKB'
+VERSION = 1
+EXTENSION = '.sdk'
+
+# magic, version, n2, bytes per cell, padding, number of boards, offset of the names section.
+HEADER = struct.Struct('<4sBBBxIQ')
+
+
+# Gets the number of bytes needed to store one cell of an n2 x n2 board.
+def get_cell_size(n2):
+    return 1 if n2 <= 15 else 2
+
+
+# Writes the given (name, values) pairs to a packed file, where values is a row-major list of cell values. The boards are streamed to the file, so the source can be a generator over millions of boards. Every board must be the same size, otherwise a ValueError is raised and no file is left behind. Returns the number of boards written.
+def write_corpus(filename, boards, save_names=True):
+    n2 = 0
+    cell_size = 0
+    count = 0
+    names = []
+
+    try:
+        with open(filename, 'wb') as out_file:
+            # The header is filled in once the number of boards is known.
+            out_file.write(bytes(HEADER.size))
+
+            for name, values in boards:
+                if count == 0:
+                    n2 = math.isqrt(len(values))
+                    cell_size = get_cell_size(n2)
+                elif len(values) != n2 * n2:
+                    raise ValueError('Board %s is not %ix%i like the boards before it. A packed file can only hold boards of one size.' % (name, n2, n2))
+
+                if cell_size == 1:
+                    out_file.write(bytes(values))
+                else:
+                    cells = array('H', values)
+
+                    if sys.byteorder == 'big':
+                        cells.byteswap()
+
+                    out_file.write(cells.tobytes())
+
+                if save_names:
+                    names.append(name)
+
+                count += 1
+
+            names_offset = 0
+
+            if save_names and count > 0:
+                names_offset = out_file.tell()
+                out_file.write('\n'.join(names).encode('utf-8'))
+
+            out_file.seek(0)
+            out_file.write(HEADER.pack(MAGIC, VERSION, n2, cell_size, count, names_offset))
+    except BaseException:
+        # Don't leave a file behind that looks like a packed file but has no valid header.
+        os.remove(filename)
+        raise
+
+    return count
+
+
+class Corpus:
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.n2, self.cell_size, self.count, self.names_offset = HEADER.unpack_from(self.mmap)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('%s is not a version %i packed board file.' % (filename, VERSION))
+
+        # The number of bytes taken by one board.
+        self.board_size = self.n2 * self.n2 * self.cell_size
+
+        # The names of the boards, read the first time one is asked for.
+        self.names = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.get_board(index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.get_board(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+    # Gets the row-major list of cell values of the board with the given number.
+    def get_values(self, index):
+        if index < 0 or index >= self.count:
+            raise IndexError('Board %i is out of range for %s, which holds %i boards.' % (index, self.filename, self.count))
+
+        start = HEADER.size + index * self.board_size
+        data = self.mmap[start:start + self.board_size]
+
+        # Iterating over bytes already gives one int per cell, without any string handling.
+        if self.cell_size == 1:
+            return list(data)
+
+        cells = array('H')
+        cells.frombytes(data)
+
+        if sys.byteorder == 'big':
+            cells.byteswap()
+
+        return cells.tolist()
+
+    # Builds an a2.Board from the board with the given number.
+    def get_board(self, index):
+        board = a2.Board()
+        board.load_values(self.get_values(index))
+        return board
+
+    # Gets the name that the board with the given number was saved under, or None if the file has no names.
+    def get_name(self, index):
+        if self.names_offset == 0:
+            return None
+
+        if self.names is None:
+            self.names = self.mmap[self.names_offset:].decode('utf-8').split('\n')
+
+        return self.names[index]
@@ -0,0 +1,214 @@
+import math
+import types
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import a2
+
+''' A board for the large sizes (25x25 and 36x36) where the Python loops of a2 hurt the most. Its candidates are an n2 x n2 x n2 NumPy boolean cube instead of a bitmask per cell: cube[row, col, value - 1] is set if value can still go in that cell.
+
+Every step of deduction is a reduction over one axis of the cube, done for the whole board at once:
+- The number of options of every cell is a sum over the value axis, and the number of places for every value in every row/col is a sum over the col/row axis. Boxes are the same sums over a (band, row in band, stack, col in stack, value) view of the cube.
+- Naked singles eliminate the values of every solved cell from its rows/cols/boxes in one pass, and hidden singles are the (row/col/box, value) pairs with exactly one place left.
+- A cell with no options, a value with no place left in some row/col/box, or a value placed twice in one is a contradiction.
+
+Backtracking takes a snapshot (a copy of the cube and the values) before every guess and restores it on failure, which for a 36x36 board is copying 46656 booleans rather than undoing changes one by one.
+
+NumPy is optional for the rest of the repository, but this board needs it. Board is compatible with a2.Board as far as loading, printing, saving and checking go, so that this module can be benchmarked like a2 (module.Solver().solveBoard(module.Board(path))).
+'''
+
+
+class Board:
+    # Loads the board from a csv file, or leaves it empty for load_values if no filename is given.
+    def __init__(self, filename=None):
+        if np is None:
+            raise ImportError('cube.Board needs NumPy.')
+
+        self.n = 0
+        self.n2 = 0
+
+        # An n2 x n2 array of the number in every cell (0 if empty).
+        self.grid = None
+
+        # The candidate cube. cube[row, col, value - 1] is set if value can still go in that cell.
+        self.cube = None
+
+        if filename is not None:
+            self.load_values(a2.read_sudoku(filename))
+
+    # A row-major list of the number in every cell, like a2.Board.values.
+    @property
+    def values(self):
+        return self.grid.ravel().tolist()
+
+    # A read-only mapping from a (row, col) pair to the number in that cell, like a2.Board.board. Cells are filled in with make_move.
+    @property
+    def board(self):
+        return types.MappingProxyType({(row, col): int(self.grid[row, col]) for row in range(self.n2) for col in range(self.n2)})
+
+    # Loads the board from a row-major list of cell values, where 0 is an empty cell.
+    def load_values(self, values):
+        self.n2 = math.isqrt(len(values))
+        self.n = math.isqrt(self.n2)
+        self.grid = np.array(values, dtype=np.int32).reshape(self.n2, self.n2)
+
+        # Givens start with just their own value, and every other cell with every value. The first deduction removes whatever the givens rule out.
+        self.cube = np.where((self.grid > 0)[:, :, None], np.arange(1, self.n2 + 1) == self.grid[:, :, None], True)
+
+    # A view of the cube indexed by (band, row in band, stack, col in stack, value - 1), so that boxes are axes 1 and 3.
+    def get_boxes(self, array):
+        n = self.n
+        return array.reshape((n, n, n, n) + array.shape[2:])
+
+    def save_sudoku(self, filename):
+        self.to_a2().save_sudoku(filename)
+
+    def print(self):
+        self.to_a2().print()
+
+    # Builds an a2.Board with the same values.
+    def to_a2(self):
+        board = a2.Board()
+        board.load_values(self.values)
+        return board
+
+    # Returns the state of the board, to be passed to restore later.
+    def snapshot(self):
+        return self.grid.copy(), self.cube.copy()
+
+    # Puts the board back to the state it had when a snapshot was taken.
+    def restore(self, snapshot):
+        grid, cube = snapshot
+        self.grid[...] = grid
+        self.cube[...] = cube
+
+    # Reduces the options of a cell to one value. Its peers lose the value on the next call to deduce.
+    def make_move(self, row, col, value):
+        self.cube[row, col] = False
+        self.cube[row, col, value - 1] = True
+
+    # Does naked and hidden singles until nothing changes. Returns False if the board turns out to have no solution.
+    def deduce(self):
+        cube = self.cube
+
+        # Counts are taken over a uint8 view of the cube with einsum, which is several times faster than summing booleans along the inner axes.
+        def count(subscripts, array):
+            return np.einsum(subscripts, array.view(np.uint8))
+
+        while True:
+            old = cube.copy()
+            num_options = count('rcv->rc', cube)
+
+            if not num_options.all():
+                return False
+
+            # Naked singles: every cell with one option left removes it from the rest of its rows/cols/boxes.
+            placed = cube & (num_options == 1)[:, :, None]
+            placed_in_rows = count('rcv->rv', placed)
+            placed_in_cols = count('rcv->cv', placed)
+            placed_in_boxes = count('arscv->asv', self.get_boxes(placed))
+
+            if (placed_in_rows > 1).any() or (placed_in_cols > 1).any() or (placed_in_boxes > 1).any():
+                return False
+
+            used = (placed_in_rows > 0)[:, None, :] | (placed_in_cols > 0)[None, :, :]
+            self.get_boxes(used)[...] |= (placed_in_boxes > 0)[:, None, :, None, :]
+            cube &= ~used | placed
+
+            # Hidden singles: a value with one place left in a row/col/box goes there.
+            places_in_rows = count('rcv->rv', cube)
+            places_in_cols = count('rcv->cv', cube)
+            places_in_boxes = count('arscv->asv', self.get_boxes(cube))
+
+            if not (places_in_rows.all() and places_in_cols.all() and places_in_boxes.all()):
+                return False
+
+            hidden = cube & ((places_in_rows == 1)[:, None, :] | (places_in_cols == 1)[None, :, :])
+            self.get_boxes(hidden)[...] |= self.get_boxes(cube) & (places_in_boxes == 1)[:, None, :, None, :]
+            num_hidden = count('rcv->rc', hidden)
+
+            if (num_hidden > 1).any():
+                return False
+
+            np.copyto(cube, hidden, where=(num_hidden == 1)[:, :, None])
+
+            # A round that changes nothing has also checked the final cube for cells without options.
+            if np.array_equal(cube, old):
+                break
+
+        # Fill in the values of every cell that has one option left.
+        self.grid[...] = np.where(num_options == 1, cube.argmax(axis=2) + 1, 0)
+        return True
+
+    # Returns the (row, col) of an unsolved cell with the fewest options, or None if every cell is solved.
+    def get_most_constrained_cell(self):
+        num_options = np.where(self.grid > 0, self.n2 + 1, self.cube.sum(axis=2))
+        cell = int(num_options.argmin())
+
+        if num_options.flat[cell] > self.n2:
+            return None
+
+        return divmod(cell, self.n2)
+
+
+class Solver:
+    def __init__(self, max_nodes=None):
+        # The most guesses that may be made before the search gives up (None for no limit).
+        self.max_nodes = max_nodes
+
+        # The number of guesses made during the last solve, and whether the last solve gave up because of max_nodes.
+        self.nodes = 0
+        self.exhausted = False
+
+    def solveBoard(self, board):
+        self.nodes = 0
+        self.exhausted = False
+        start = board.snapshot()
+
+        # The guess stack. Each frame is [row, col, values not tried yet, snapshot from before the cell was guessed].
+        stack = []
+
+        while True:
+            if board.deduce():
+                cell = board.get_most_constrained_cell()
+
+                if cell is None:
+                    return True
+
+                row, col = cell
+                stack.append([row, col, (np.flatnonzero(board.cube[row, col]) + 1).tolist(), board.snapshot()])
+
+            # Find the deepest guess that still has values left, undoing everything done since it was made.
+            while stack:
+                frame = stack[-1]
+                board.restore(frame[3])
+
+                if frame[2]:
+                    break
+
+                stack.pop()
+            else:
+                board.restore(start)
+                return False
+
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                self.exhausted = True
+                board.restore(start)
+                return False
+
+            self.nodes += 1
+            board.make_move(frame[0], frame[1], frame[2].pop(0))
+
+
+if __name__ == "__main__":
+    import time
+
+    # change this to the input file that you'd like to test
+    board = Board('tests/test-6-ridiculous/06.csv')
+    start = time.perf_counter()
+    Solver().solveBoard(board)
+    print('Solved in %.3fs' % (time.perf_counter() - start))
+    board.print()
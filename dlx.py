@@ -0,0 +1,233 @@
+import a2
+
+''' A second engine that solves a board as an exact cover problem with Knuth's Algorithm X and dancing links (DLX), instead of the propagate-and-guess search in a2.
+
+Every way of filling a cell (a cell and a value) is a row of the cover matrix, and every rule of the board is a column: each cell holds one value, and each row, col and box holds each value once. A solution is a set of rows that covers every column exactly once. Rows for values that a given already rules out are left out, and so are columns that the givens already satisfy, so only the open part of the board is searched.
+
+The matrix is a set of circular doubly linked lists stored in flat lists (left, right, up, down) indexed by node number, which keeps covering and uncovering a column to a few list assignments. The search always branches on the column with the fewest rows left, and is a loop over an explicit stack so 36x36 boards cannot hit the recursion limit.
+'''
+
+# Board is re-exported for benchmark.py/contest_benchmark.py.
+Board = a2.Board
+
+
+class Solver:
+    def __init__(self):
+        # The number of rows tried during the last solve.
+        self.nodes = 0
+
+    def solveBoard(self, board):
+        self.nodes = 0
+        self.build(board)
+        rows = self.search()
+
+        if rows is None:
+            return False
+
+        for row in rows:
+            cell, value = self.row_choices[row]
+            board.make_move(cell, value)
+
+        return True
+
+    # Builds the cover matrix for the open part of a board.
+    def build(self, board):
+        n2 = board.n2
+
+        # A mapping from a constraint to its column number. Constraints are (kind, section, value) tuples, where the section is a cell number for kind 0 and a row/col/box number for kinds 1/2/3.
+        column_of = {}
+
+        # Node 0 is the root. Column headers and the nodes of rows are both just node numbers, added as they are needed.
+        self.left = [0]
+        self.right = [0]
+        self.up = [0]
+        self.down = [0]
+        self.column = [0]
+
+        # A mapping from a column header to the number of nodes left in its column (unused for other nodes).
+        self.size = [0]
+
+        # A mapping from a node to the row it belongs to, and from a row to the (cell, value) it stands for.
+        self.row_of_node = [-1]
+        self.row_choices = []
+
+        def get_column(constraint):
+            col = column_of.get(constraint)
+
+            if col is None:
+                col = len(self.left)
+                column_of[constraint] = col
+
+                # Insert the new header just left of the root.
+                self.left.append(self.left[0])
+                self.right.append(0)
+                self.right[self.left[0]] = col
+                self.left[0] = col
+                self.up.append(col)
+                self.down.append(col)
+                self.column.append(col)
+                self.size.append(0)
+                self.row_of_node.append(-1)
+
+            return col
+
+        # Every open constraint gets its column before any rows are added. A cell with no options left, or a value that no cell of a row/col/box can still hold, is then an empty column that the search fails on, instead of a constraint that is silently left out of the cover.
+        for cell in sorted(board.unsolved_cells):
+            get_column((0, cell, 0))
+
+        for kind, used_in_sections in enumerate((board.used_in_rows, board.used_in_cols, board.used_in_boxes)):
+            for section, used in enumerate(used_in_sections):
+                missing = board.all_options & ~used
+
+                while missing:
+                    bit = missing & -missing
+                    missing ^= bit
+                    get_column((1 + kind, kind * n2 + section, bit.bit_length()))
+
+        for cell in sorted(board.unsolved_cells):
+            options = board.get_options(cell)
+            constraints = (board.row_of[cell], n2 + board.col_of[cell], 2 * n2 + board.box_of[cell])
+
+            while options:
+                bit = options & -options
+                options ^= bit
+                value = bit.bit_length()
+                row = len(self.row_choices)
+                self.row_choices.append((cell, value))
+
+                columns = [get_column((0, cell, 0))] + [get_column((1 + kind, section, value)) for kind, section in enumerate(constraints)]
+                first = len(self.left)
+
+                for offset, col in enumerate(columns):
+                    node = first + offset
+
+                    # Link the node into its row (circular, so the last node points back to the first) and at the bottom of its column.
+                    self.left.append(node - 1 if offset > 0 else first + len(columns) - 1)
+                    self.right.append(node + 1 if offset < len(columns) - 1 else first)
+                    self.up.append(self.up[col])
+                    self.down.append(col)
+                    self.down[self.up[col]] = node
+                    self.up[col] = node
+                    self.column.append(col)
+                    self.row_of_node.append(row)
+                    self.size.append(0)
+                    self.size[col] += 1
+
+    # Removes a column from the header list, and every row that has a node in that column from the other columns.
+    def cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+
+        i = down[col]
+
+        while i != col:
+            j = right[i]
+
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+
+            i = down[i]
+
+    # Undoes cover(col), relinking everything in the exact reverse order.
+    def uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+
+        i = up[col]
+
+        while i != col:
+            j = left[i]
+
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+
+            i = up[i]
+
+        right[left[col]] = col
+        left[right[col]] = col
+
+    # Chooses a row: covers every other column that the row's node has a node in.
+    def select(self, node):
+        j = self.right[node]
+
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    # Undoes select(node).
+    def deselect(self, node):
+        j = self.left[node]
+
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+    # Runs Algorithm X. Returns the list of chosen rows, or None if there is no exact cover.
+    def search(self):
+        right, down, size = self.right, self.down, self.size
+
+        # Each frame is [column that was covered, node of the row currently chosen for it].
+        stack = []
+
+        while True:
+            if right[0] == 0:
+                return [self.row_of_node[node] for col, node in stack]
+
+            # Branch on the column with the fewest rows left.
+            best = right[0]
+            col = right[best]
+
+            while col != 0 and size[best] > 1:
+                if size[col] < size[best]:
+                    best = col
+
+                col = right[col]
+
+            if size[best] > 0:
+                self.cover(best)
+                node = down[best]
+                self.select(node)
+                self.nodes += 1
+                stack.append([best, node])
+                continue
+
+            # Dead end: move on to the next row of the deepest column that still has one, undoing everything below it.
+            while stack:
+                frame = stack[-1]
+                col, node = frame
+                self.deselect(node)
+                node = down[node]
+
+                if node != col:
+                    self.select(node)
+                    self.nodes += 1
+                    frame[1] = node
+                    break
+
+                self.uncover(col)
+                stack.pop()
+            else:
+                return None
+
+
+if __name__ == "__main__":
+    import time
+
+    # change this to the input file that you'd like to test
+    board = Board('tests/test-6-ridiculous/06.csv')
+    start = time.perf_counter()
+    Solver().solveBoard(board)
+    print('Solved in %.3fs' % (time.perf_counter() - start))
+    board.print()
+
+    # Cells 1, 7, 10 and 13 of this board have no options left, so it has no solution even though its givens do not clash.
+    board = Board()
+    board.load_values([4, 0, 2, 3, 3, 1, 4, 0, 1, 4, 0, 2, 2, 0, 3, 1])
+    assert not Solver().solveBoard(board) and len(board.unsolved_cells) == 4
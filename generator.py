@@ -0,0 +1,163 @@
+import random
+
+import a2
+
+''' Generates puzzles with exactly one solution, for benchmarks and for play.
+
+A puzzle starts out as a full random grid: the boxes on the diagonal do not share any rows or cols, so each is filled with a random shuffle, and the a2 solver fills in the rest. Clues are then taken away one symmetry orbit at a time (e.g. a cell and the cell opposite it for rotational symmetry), in random order, and put back if the puzzle stops having one solution. The result is minimal for its symmetry: no orbit can be taken away without losing uniqueness.
+
+Every uniqueness test runs on the same Board, so no board is parsed or built after the first one, and the clues that have not been tried yet stay on the board from one test to the next (see remove_clues); a test places the clues kept so far, searches, and rolls back. Since the full grid is known to be a solution, the puzzle without an orbit has another one exactly when it can be solved with one of the orbit's cells holding a different value, so each test is a search for any solution with that value eliminated, which usually hits a contradiction quickly, instead of a count up to two.
+
+On 9x9 boards a puzzle takes a few hundredths of a second. From 16x16 up, the odd uniqueness test needs a huge search, so the time per puzzle is heavy-tailed (3 to 45 seconds or more for a 16x16 board without a limit). By default, each test there gives up after LARGE_MAX_NODES guesses and keeps its clues. That makes a 16x16 puzzle take 1 to 2 seconds, with about 2 more clues than it would need otherwise.
+'''
+
+# The most guesses a uniqueness test makes by default on boards of 16x16 and up.
+LARGE_MAX_NODES = 20
+
+# Ways of mirroring a cell onto the other cells of its orbit, given as functions of (row, col, n2 - 1).
+SYMMETRIES = {
+    'none': [],
+    'rotational': [lambda row, col, last: (last - row, last - col)],
+    'mirror': [lambda row, col, last: (row, last - col)],
+    'diagonal': [lambda row, col, last: (col, row)],
+    'dihedral': [
+        lambda row, col, last: (col, last - row),
+        lambda row, col, last: (last - row, last - col),
+        lambda row, col, last: (last - col, row),
+        lambda row, col, last: (row, last - col),
+        lambda row, col, last: (last - row, col),
+        lambda row, col, last: (col, row),
+        lambda row, col, last: (last - col, last - row),
+    ],
+}
+
+
+# Splits the cells of an n2 x n2 board into the orbits of a symmetry. Returns a list of sorted tuples of cells.
+def get_orbits(n2, symmetry):
+    mirrors = SYMMETRIES[symmetry]
+    orbits = set()
+
+    for row in range(n2):
+        for col in range(n2):
+            cells = {row * n2 + col}
+
+            for mirror in mirrors:
+                other_row, other_col = mirror(row, col, n2 - 1)
+                cells.add(other_row * n2 + other_col)
+
+            orbits.add(tuple(sorted(cells)))
+
+    return sorted(orbits)
+
+
+class Generator:
+    def __init__(self, n=3, symmetry='none', seed=None, max_nodes='auto', techniques=()):
+        self.n = n
+        self.n2 = n * n
+        self.random = random.Random(seed)
+        self.orbits = get_orbits(self.n2, symmetry)
+
+        # The most guesses a uniqueness test may make: None for no limit, or 'auto' for no limit on boards up to 9x9 and LARGE_MAX_NODES from 16x16 up. A test that gives up keeps the clues, so a limit trades fewer removed clues for a bounded time per puzzle on large boards. Most tests end in a quick contradiction, which singles find faster than the other techniques pay for themselves, so none are used by default.
+        if max_nodes == 'auto':
+            max_nodes = LARGE_MAX_NODES if n >= 4 else None
+
+        self.solver = a2.Solver(max_nodes=max_nodes, techniques=techniques)
+
+        # Full grids are filled in without a limit, since a solver that gives up would only make generate_solution start over.
+        self.grid_solver = a2.Solver(techniques=techniques)
+
+        # The board that every grid and every uniqueness test is worked out on, and the checkpoint where it has no values.
+        self.board = a2.Board()
+        self.board.load_values([0] * (self.n2 * self.n2))
+        self.empty = self.board.checkpoint()
+
+    # Generates a random full grid. Returns a row-major list of cell values.
+    def generate_solution(self):
+        board = self.board
+        n, n2 = self.n, self.n2
+
+        # Some fillings of the diagonal boxes cannot be completed (e.g. on 4x4 boards), so keep trying until one can.
+        while True:
+            for box in range(n):
+                values = list(range(1, n2 + 1))
+                self.random.shuffle(values)
+
+                for i, value in enumerate(values):
+                    board.make_move((box * n + i // n) * n2 + box * n + i % n, value)
+
+            if self.grid_solver.solveBoard(board):
+                break
+
+            board.rollback(self.empty)
+
+        solution = list(board.values)
+        board.rollback(self.empty)
+        return solution
+
+    # Checks whether the clues on the board plus the given extra clues (a list of (cell, value) pairs) have no solution other than the full grid when the cells of an orbit are left empty. The board is left as it was.
+    def is_unique_without(self, clues, orbit, solution):
+        board = self.board
+        start = board.checkpoint()
+
+        for cell in orbit:
+            for clue_cell, value in clues:
+                board.make_move(clue_cell, value)
+
+            board.eliminate(cell, 1 << (solution[cell] - 1))
+            other = self.solver.search(board, 1)
+            board.rollback(start)
+
+            # A test that gave up may have missed another solution.
+            if other or self.solver.exhausted:
+                return False
+
+        return True
+
+    # Takes clues away from a full grid one orbit at a time, as long as the puzzle keeps exactly one solution and has at least min_clues clues. Returns the puzzle as a row-major list of cell values.
+    def remove_clues(self, solution, min_clues=0):
+        board = self.board
+        orbits = list(self.orbits)
+        self.random.shuffle(orbits)
+
+        # The orbits are placed on the board in the reverse of the order they are tried in, so when an orbit is tried, rolling back to the checkpoint from before it was placed leaves exactly the orbits that have not been tried yet. Only the clues kept from earlier orbits have to be placed again for every test.
+        checkpoints = []
+
+        for orbit in reversed(orbits):
+            checkpoints.append(board.checkpoint())
+
+            for cell in orbit:
+                board.make_move(cell, solution[cell])
+
+        checkpoints.reverse()
+        kept = []
+
+        for orbit, checkpoint in zip(orbits, checkpoints):
+            board.rollback(checkpoint)
+
+            if len(solution) - len(board.unsolved_cells) + len(kept) < min_clues or not self.is_unique_without(kept, orbit, solution):
+                kept.extend((cell, solution[cell]) for cell in orbit)
+
+        board.rollback(self.empty)
+        puzzle = [0] * len(solution)
+
+        for cell, value in kept:
+            puzzle[cell] = value
+
+        return puzzle
+
+    # Generates a puzzle with exactly one solution. Returns (puzzle, solution) as row-major lists of cell values.
+    def generate(self, min_clues=0):
+        solution = self.generate_solution()
+        return self.remove_clues(solution, min_clues), solution
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    puzzle, solution = Generator(symmetry='rotational').generate()
+    print('Generated a puzzle with %i clues in %.3fs' % (sum(1 for value in puzzle if value), time.perf_counter() - start))
+
+    board = a2.Board()
+    board.load_values(puzzle)
+    board.print()
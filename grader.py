@@ -0,0 +1,94 @@
+import math
+
+import a2
+
+''' Grades how hard a board is, so that new puzzles can be bucketed like the test folders and hard ones routed to heavier workers.
+
+A board is graded the way a person would solve it: singles first, then the a2 techniques in cost order, going back to singles after every elimination, and guessing only once all of them are stuck. The grade records which techniques were needed before the first guess, how many options each eliminated, and how much searching was left: the number of cells guessed on and the number of guesses tried (the size of the search tree).
+
+The score is the level of the hardest step needed: 1 for singles only, up to 5 for fish (see LEVELS), and GUESS_LEVEL + log2 of the search tree size for boards that need guessing, so that each doubling of the search adds one point. Boards without a solution, and boards the solver gave up on, have no score at all, and their hardest step is 'unsolvable' or 'gave_up', so that they are never taken for easy ones. Grading costs about as much as one solve with every technique turned on.
+'''
+
+# The techniques in the order they are tried, with the score of a board that needs them but nothing harder.
+LEVELS = {
+    'singles': 1,
+    'locked_candidates': 2,
+    'naked_subsets': 3,
+    'hidden_subsets': 4,
+    'fish': 5,
+}
+
+# The score of a board that needs a single guess. Every doubling of the search tree adds one.
+GUESS_LEVEL = 6
+
+
+class Grade:
+    def __init__(self):
+        # Whether the board has a solution at all (within the solver's limits).
+        self.solved = False
+
+        # A mapping from every technique that eliminated options before the first guess to the number of options it eliminated.
+        self.techniques = {}
+
+        # The hardest step needed: 'singles', a technique name, or 'guessing'. 'unsolvable' if the board has no solution, and 'gave_up' if the solver hit its limits first.
+        self.hardest = 'singles'
+
+        # The number of cells guessed on, and the number of guesses tried.
+        self.branches = 0
+        self.nodes = 0
+
+        # The score of the board (see above), or None if it was not solved.
+        self.score = None
+
+
+class Grader:
+    def __init__(self, max_nodes=None, max_seconds=None, max_subset_size=4, max_fish_size=None):
+        self.solver = a2.Solver(max_nodes=max_nodes, max_seconds=max_seconds, techniques=[name for name in LEVELS if name != 'singles'], max_subset_size=max_subset_size, max_fish_size=max_fish_size)
+
+    # Grades a board, leaving it as it was given. Returns a Grade.
+    def grade(self, board):
+        solver = self.solver
+        grade = Grade()
+        start = board.checkpoint()
+
+        # Deduce without guessing first, to see which techniques the board needs.
+        solver.reset_stats()
+        board.pending_cells.extend(board.unsolved_cells)
+
+        if solver.deduce(board):
+            for name, (runs, seconds, eliminated) in solver.technique_stats.items():
+                if eliminated:
+                    grade.techniques[name] = eliminated
+                    grade.hardest = name
+
+            # Whatever is left is searched from where deduction got stuck.
+            grade.solved = solver.solveBoard(board)
+            grade.branches = solver.branches
+            grade.nodes = solver.nodes
+            exhausted = solver.exhausted
+        else:
+            # The solver is shared between boards, so its exhausted flag is about the last search of another board.
+            exhausted = False
+
+        if not grade.solved:
+            grade.hardest = 'gave_up' if exhausted else 'unsolvable'
+        elif grade.nodes:
+            grade.hardest = 'guessing'
+            grade.score = GUESS_LEVEL + math.log2(grade.nodes)
+        else:
+            grade.score = float(LEVELS[grade.hardest])
+
+        board.rollback(start)
+        return grade
+
+
+if __name__ == "__main__":
+    import sys
+
+    # change this to the input file that you'd like to test, or pass it as an argument
+    board = a2.Board(sys.argv[1] if len(sys.argv) > 1 else 'tests/test-3-hard/00.csv')
+    grade = Grader().grade(board)
+    if grade.solved:
+        print('Score %.2f (%s), %i guesses on %i cells, eliminations: %s' % (grade.score, grade.hardest, grade.nodes, grade.branches, grade.techniques))
+    else:
+        print('Not solved (%s) after %i guesses on %i cells' % (grade.hardest, grade.nodes, grade.branches))
@@ -0,0 +1,129 @@
+import itertools
+import math
+
+import a2
+import batched
+
+''' The one-line puzzle format used by most puzzle dumps, so boards can be streamed without any files.
+
+A board is one line with one character per cell in row-major order: '.' or '0' for an empty cell, '1'-'9' for 1-9 and 'A'-'Z' (or 'a'-'z') for 10-35, e.g. 81 characters for a 9x9 board and 256 for a 16x16 board. Boards with values above 35 (36x36 and up), or any board at all, can instead separate the cells with commas or whitespace, in which case each cell is a number, with '', '.' or '0' for an empty cell. Solutions are written in the same form as the puzzle they came from.
+'''
+
+# The characters used for the values 1-35 in the one-character-per-cell form.
+DIGITS = '123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+# Parses a board line into a row-major list of cell values, and returns it with the separator used (None for the one-character-per-cell form). Raises ValueError if the line is not a square board.
+def parse_line(line):
+    line = line.strip()
+
+    if ',' in line:
+        separator = ','
+        values = [0 if item.strip() in ('', '.') else int(item) for item in line.split(',')]
+    elif any(char.isspace() for char in line):
+        separator = ' '
+        values = [0 if item == '.' else int(item) for item in line.split()]
+    else:
+        separator = None
+        values = []
+
+        for char in line:
+            if char == '.' or char == '0':
+                values.append(0)
+            else:
+                value = DIGITS.find(char.upper()) + 1
+
+                if value == 0:
+                    raise ValueError('%r is not a cell value.' % char)
+
+                values.append(value)
+
+    n2 = math.isqrt(len(values))
+    n = math.isqrt(n2)
+
+    if n2 == 0 or n2 * n2 != len(values) or n * n != n2:
+        raise ValueError('%i cells do not make a square board.' % len(values))
+
+    for value in values:
+        if value < 0 or value > n2:
+            raise ValueError('%i is not a value on a %ix%i board.' % (value, n2, n2))
+
+    return values, separator
+
+
+# Formats a row-major list of cell values as a board line, using the given separator (None for one character per cell, which falls back to commas for boards too big for it).
+def format_line(values, separator=None):
+    if separator is None and len(values) > len(DIGITS) * len(DIGITS):
+        separator = ','
+
+    if separator is None:
+        return ''.join(DIGITS[value - 1] if value else '.' for value in values)
+
+    return separator.join(str(value) for value in values)
+
+
+# Solves a list of boards given as row-major lists of cell values, one at a time. Returns a list with the solved values of every board, or None for boards that could not be solved.
+def solve_each(puzzles, solver):
+    solutions = []
+
+    for values in puzzles:
+        board = a2.Board()
+        board.load_values(values)
+        solutions.append(board.values if solver.solveBoard(board) else None)
+
+    return solutions
+
+
+# Reads one board per line from in_file and writes one line per board to out_file, in the same order: the solution, or the puzzle unchanged if it could not be solved. Empty lines are passed through. Boards are read and solved batch_size lines at a time, together with batched.solve_batch if batch_size is more than 1, so only one batch is held in memory at a time. Returns (number of boards, number solved).
+def solve_stream(in_file, out_file, solver=None, errors=None, batch_size=1):
+    if solver is None:
+        solver = a2.Solver()
+
+    num_boards = 0
+    num_solved = 0
+    line_num = 0
+
+    while True:
+        lines = list(itertools.islice(in_file, batch_size))
+
+        if not lines:
+            return num_boards, num_solved
+
+        # The (values, separator) of every line, or None for the lines that are passed through.
+        boards = []
+
+        for line in lines:
+            line_num += 1
+
+            if not line.strip():
+                boards.append(None)
+                continue
+
+            num_boards += 1
+
+            try:
+                boards.append(parse_line(line))
+            except ValueError as err:
+                if errors is not None:
+                    errors.write('Line %i: %s\n' % (line_num, err))
+
+                boards.append(None)
+
+        puzzles = [board[0] for board in boards if board is not None]
+        solutions = iter(batched.solve_batch(puzzles, solver) if batch_size > 1 else solve_each(puzzles, solver))
+
+        for i, (line, board) in enumerate(zip(lines, boards)):
+            if board is None:
+                out_file.write(line.strip() + '\n')
+                continue
+
+            values, separator = board
+            solution = next(solutions)
+
+            if solution is not None:
+                num_solved += 1
+                values = solution
+            elif errors is not None:
+                errors.write('Line %i: no solution found.\n' % (line_num - len(lines) + i + 1))
+
+            out_file.write(format_line(values, separator) + '\n')
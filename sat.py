@@ -0,0 +1,426 @@
+import heapq
+
+import a2
+
+''' A third engine that solves a board by encoding it as a boolean satisfiability (SAT) problem and running a conflict-driven clause learning (CDCL) SAT solver on it. Everything is pure Python; no external solver is needed.
+
+Every value that is still legal in an open cell is a variable, which is true if the cell holds that value. The clauses say that every cell holds at least one and at most one of its values, and that every row/col/box holds every value it is still missing at least once and at most once.
+
+The SAT solver is a small CDCL solver in the style of MiniSat:
+- Unit propagation uses two watched literals per clause, so a clause is only looked at when one of its two watched literals becomes false.
+- When propagation runs into a conflict, the conflict is analyzed back to its first unique implication point (1-UIP), and the resulting clause is learned so that the same contradiction is never explored again.
+- The search then jumps straight back to the second highest decision level in the learned clause (non-chronological backjumping) instead of undoing only the last guess.
+- Variables are picked by VSIDS activity (bumped for every variable in a conflict, decayed over time), with phase saving and Luby restarts.
+
+Literals are numbers: variable v is literal 2v when true and 2v + 1 when false, so the negation of a literal is lit ^ 1 and its variable is lit >> 1.
+'''
+
+# Board is re-exported for benchmark.py/contest_benchmark.py.
+Board = a2.Board
+
+
+# Gets the i-th (1-based) number of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ... used to space out restarts.
+def luby(i):
+    k = 1
+
+    while (1 << k) - 1 < i:
+        k += 1
+
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+
+        while (1 << k) - 1 < i:
+            k += 1
+
+    return 1 << (k - 1)
+
+
+class SatSolver:
+    def __init__(self, num_vars, max_conflicts=None):
+        self.num_vars = num_vars
+
+        # The most conflicts that may be hit before the solver gives up. None means no limit.
+        self.max_conflicts = max_conflicts
+
+        # Every clause, the original ones first and the learned ones after them. The first two literals of a clause of two or more literals are the watched ones.
+        self.clauses = []
+
+        # A mapping from a literal to the clauses watching it, which have to be looked at when the literal becomes false.
+        self.watches = [[] for i in range(2 * num_vars + 2)]
+
+        # A mapping from a literal to 1 if it is true, -1 if it is false and 0 if its variable is unassigned.
+        self.value = [0 for i in range(2 * num_vars + 2)]
+
+        # A mapping from a variable to the decision level it was assigned at, and to the clause that implied it (None for decisions and level 0 facts).
+        self.level = [0 for i in range(num_vars + 1)]
+        self.reason = [None for i in range(num_vars + 1)]
+
+        # The assigned literals in the order they were assigned, the position in the trail where each decision level starts, and the next literal to propagate.
+        self.trail = []
+        self.trail_lim = []
+        self.queue_head = 0
+
+        # VSIDS activity of every variable, the amount the next bump adds, and a heap of (-activity, variable) used to pick the next decision. Heap entries go stale when the activity changes, and are skipped.
+        self.activity = [0.0 for i in range(num_vars + 1)]
+        self.activity_inc = 1.0
+        self.heap = [(0.0, var) for var in range(1, num_vars + 1)]
+
+        # The last value every variable had, which is tried first the next time it is decided.
+        self.saved_phase = [False for i in range(num_vars + 1)]
+
+        # Scratch space for analyze.
+        self.seen = [False for i in range(num_vars + 1)]
+
+        # Whether an empty clause was added, or a conflict was found with no decisions made.
+        self.unsatisfiable = False
+
+        # Statistics of the last solve.
+        self.conflicts = 0
+        self.decisions = 0
+        self.exhausted = False
+
+    # Adds a clause (a list of literals, one of which must be true). Must be called before solve.
+    def add_clause(self, lits):
+        lits = list(dict.fromkeys(lits))
+
+        # A clause with both a literal and its negation is always true.
+        for lit in lits:
+            if lit ^ 1 in lits:
+                return
+
+        if len(lits) == 0:
+            self.unsatisfiable = True
+        elif len(lits) == 1:
+            if self.value[lits[0]] == -1:
+                self.unsatisfiable = True
+            elif self.value[lits[0]] == 0:
+                self.enqueue(lits[0], None)
+        else:
+            self.watches[lits[0]].append(len(self.clauses))
+            self.watches[lits[1]].append(len(self.clauses))
+            self.clauses.append(lits)
+
+    # Makes a literal true at the current decision level.
+    def enqueue(self, lit, reason):
+        var = lit >> 1
+        self.value[lit] = 1
+        self.value[lit ^ 1] = -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    # Propagates every unit clause. Returns the number of a clause that became false, or None if there was no conflict.
+    def propagate(self):
+        value = self.value
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+
+        while self.queue_head < len(trail):
+            false_lit = trail[self.queue_head] ^ 1
+            self.queue_head += 1
+
+            watching = watches[false_lit]
+            i = 0
+            j = 0
+
+            while i < len(watching):
+                index = watching[i]
+                i += 1
+                clause = clauses[index]
+
+                # Keep the literal that just became false in the second watched position.
+                if clause[0] == false_lit:
+                    clause[0] = clause[1]
+                    clause[1] = false_lit
+
+                # The clause is already true through its other watched literal.
+                if value[clause[0]] == 1:
+                    watching[j] = index
+                    j += 1
+                    continue
+
+                # Look for another literal that is not false to watch instead.
+                for k in range(2, len(clause)):
+                    if value[clause[k]] != -1:
+                        clause[1] = clause[k]
+                        clause[k] = false_lit
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    watching[j] = index
+                    j += 1
+
+                    if value[clause[0]] == -1:
+                        # Every literal is false. Keep the rest of the watches and report the conflict.
+                        while i < len(watching):
+                            watching[j] = watching[i]
+                            j += 1
+                            i += 1
+
+                        del watching[j:]
+                        return index
+
+                    self.enqueue(clause[0], index)
+
+            del watching[j:]
+
+        return None
+
+    # Increases the activity of a variable that took part in a conflict.
+    def bump(self, var):
+        self.activity[var] += self.activity_inc
+
+        if self.activity[var] > 1e100:
+            # Scale everything down before the numbers overflow.
+            for other in range(1, self.num_vars + 1):
+                self.activity[other] *= 1e-100
+
+            self.activity_inc *= 1e-100
+            self.heap = [(-self.activity[other], other) for other in range(1, self.num_vars + 1) if self.value[2 * other] == 0]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    # Learns a clause from a conflict. Returns the clause, whose first literal is the only one at the current level (the 1-UIP), and the level to jump back to.
+    def analyze(self, conflict):
+        seen = self.seen
+        level = self.level
+        trail = self.trail
+        current_level = len(self.trail_lim)
+
+        learned = [None]
+        touched = []
+        at_current_level = 0
+        lit = None
+        index = len(trail) - 1
+        clause = self.clauses[conflict]
+
+        while True:
+            # The first literal of a reason clause is the one it implied, which is already being handled.
+            for other in (clause if lit is None else clause[1:]):
+                var = other >> 1
+
+                if not seen[var] and level[var] > 0:
+                    seen[var] = True
+                    touched.append(var)
+                    self.bump(var)
+
+                    if level[var] == current_level:
+                        at_current_level += 1
+                    else:
+                        learned.append(other)
+
+            # Walk back along the trail to the next literal involved in the conflict.
+            while not seen[trail[index] >> 1]:
+                index -= 1
+
+            lit = trail[index]
+            index -= 1
+            at_current_level -= 1
+
+            if at_current_level == 0:
+                break
+
+            clause = self.clauses[self.reason[lit >> 1]]
+
+        for var in touched:
+            seen[var] = False
+
+        learned[0] = lit ^ 1
+
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal from the highest remaining level second, so the clause becomes unit right after the jump.
+        best = 1
+
+        for i in range(2, len(learned)):
+            if level[learned[i] >> 1] > level[learned[best] >> 1]:
+                best = i
+
+        learned[1], learned[best] = learned[best], learned[1]
+        return learned, level[learned[1] >> 1]
+
+    # Undoes every assignment above the given decision level.
+    def backtrack(self, target_level):
+        if len(self.trail_lim) <= target_level:
+            return
+
+        start = self.trail_lim[target_level]
+
+        for lit in self.trail[start:]:
+            var = lit >> 1
+            self.value[lit] = 0
+            self.value[lit ^ 1] = 0
+            self.reason[var] = None
+            self.saved_phase[var] = not lit & 1
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+        del self.trail[start:]
+        del self.trail_lim[target_level:]
+        self.queue_head = start
+
+    # Picks the unassigned variable with the highest activity, or returns None if every variable is assigned.
+    def pick_branch_var(self):
+        heap = self.heap
+
+        while heap:
+            negative_activity, var = heapq.heappop(heap)
+
+            if self.value[2 * var] == 0 and -negative_activity == self.activity[var]:
+                return var
+
+        # Stale entries may have hidden a variable; fall back to a scan.
+        for var in range(1, self.num_vars + 1):
+            if self.value[2 * var] == 0:
+                return var
+
+        return None
+
+    # Runs the search. Returns the list of true variables, or None if the clauses cannot all be satisfied (or the solver gave up, see exhausted).
+    def solve(self):
+        self.conflicts = 0
+        self.decisions = 0
+        self.exhausted = False
+
+        if self.unsatisfiable:
+            return None
+
+        restarts = 1
+        restart_limit = 100 * luby(restarts)
+        conflicts_since_restart = 0
+
+        while True:
+            conflict = self.propagate()
+
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_since_restart += 1
+
+                if not self.trail_lim:
+                    return None
+
+                learned, back_level = self.analyze(conflict)
+                self.backtrack(back_level)
+
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    index = len(self.clauses)
+                    self.clauses.append(learned)
+                    self.watches[learned[0]].append(index)
+                    self.watches[learned[1]].append(index)
+                    self.enqueue(learned[0], index)
+
+                self.activity_inc /= 0.95
+
+                if self.max_conflicts is not None and self.conflicts >= self.max_conflicts:
+                    self.exhausted = True
+                    return None
+
+                if conflicts_since_restart >= restart_limit:
+                    restarts += 1
+                    restart_limit = 100 * luby(restarts)
+                    conflicts_since_restart = 0
+                    self.backtrack(0)
+            else:
+                var = self.pick_branch_var()
+
+                if var is None:
+                    return [var for var in range(1, self.num_vars + 1) if self.value[2 * var] == 1]
+
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(2 * var if self.saved_phase[var] else 2 * var + 1, None)
+
+
+class Solver:
+    def __init__(self, max_conflicts=None):
+        # The most conflicts the SAT solver may hit before giving up. None means no limit.
+        self.max_conflicts = max_conflicts
+
+        # The SAT solver used for the last board, kept for its statistics (conflicts, decisions, learned clauses).
+        self.sat = None
+
+        # Whether the last solve was cut short by max_conflicts.
+        self.exhausted = False
+
+    def solveBoard(self, board):
+        choices, clauses = self.encode(board)
+        self.sat = SatSolver(len(choices) - 1, self.max_conflicts)
+
+        for clause in clauses:
+            self.sat.add_clause(clause)
+
+        model = self.sat.solve()
+        self.exhausted = self.sat.exhausted
+
+        if model is None:
+            return False
+
+        for var in model:
+            cell, value = choices[var]
+            board.make_move(cell, value)
+
+        return True
+
+    # Encodes the open part of a board as CNF. Returns a mapping from a variable to the (cell, value) it stands for (variable 0 is unused), and the list of clauses.
+    def encode(self, board):
+        choices = [None]
+        clauses = []
+
+        # A mapping from a row/col/box (as numbered in board.units) and a value to the literals of the cells that can still hold that value there.
+        unit_lits = {}
+
+        for cell in sorted(board.unsolved_cells):
+            options = board.get_options(cell)
+            cell_lits = []
+
+            while options:
+                bit = options & -options
+                options ^= bit
+                value = bit.bit_length()
+
+                lit = 2 * len(choices)
+                choices.append((cell, value))
+                cell_lits.append(lit)
+
+                for unit in board.units_of[cell]:
+                    unit_lits.setdefault((unit, value), []).append(lit)
+
+            # Every cell holds at least one and at most one value.
+            clauses.append(cell_lits)
+            clauses.extend([a ^ 1, b ^ 1] for i, a in enumerate(cell_lits) for b in cell_lits[i + 1:])
+
+        for unit, cells in enumerate(board.units):
+            filled = 0
+
+            for cell in cells:
+                if board.values[cell]:
+                    filled |= 1 << (board.values[cell] - 1)
+
+            missing = board.all_options & ~filled
+
+            # Every missing value goes somewhere in the section, and only once.
+            while missing:
+                bit = missing & -missing
+                missing ^= bit
+                lits = unit_lits.get((unit, bit.bit_length()), [])
+                clauses.append(lits)
+                clauses.extend([a ^ 1, b ^ 1] for i, a in enumerate(lits) for b in lits[i + 1:])
+
+        return choices, clauses
+
+
+if __name__ == "__main__":
+    import time
+
+    # change this to the input file that you'd like to test
+    board = Board('tests/test-6-ridiculous/06.csv')
+    solver = Solver()
+    start = time.perf_counter()
+    solver.solveBoard(board)
+    print('Solved in %.3fs (%d conflicts, %d decisions)' % (time.perf_counter() - start, solver.sat.conflicts, solver.sat.decisions))
+    board.print()
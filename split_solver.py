@@ -0,0 +1,113 @@
+import multiprocessing
+import os
+
+import a2
+
+''' Solves a single hard board on several cores at once. The first few guesses of the a2 search are made up front, and every resulting subtree (the list of guesses that leads to it) is searched by its own worker process with the ordinary a2.Solver. Subtrees never share any cells that have not been decided yet, so the workers do not have to talk to each other. As soon as one worker finds a solution, the pool is terminated, which cancels the workers that are still searching.
+'''
+
+# Board is re-exported for benchmark.py/contest_benchmark.py.
+Board = a2.Board
+
+
+# Solves the subtree reached by making the given (cell, value) guesses on a board with the given starting values. Returns the values of the solved board, or None if the subtree has no solution.
+def solve_subtree(task):
+    values, guesses = task
+    board = a2.Board()
+    board.load_values(list(values))
+
+    for cell, value in guesses:
+        board.make_move(cell, value)
+
+    if a2.Solver().solveBoard(board):
+        return board.values
+
+    return None
+
+
+class Solver:
+    def __init__(self, workers=None, split_depth=4, subtrees_per_worker=4):
+        # The number of worker processes (os.cpu_count() by default).
+        self.workers = workers
+
+        # The most guesses that are made up front, and how many subtrees each worker should get before splitting stops.
+        self.split_depth = split_depth
+        self.subtrees_per_worker = subtrees_per_worker
+
+    def solveBoard(self, board):
+        solver = a2.Solver()
+        values = list(board.values)
+        start = board.checkpoint()
+
+        board.pending_cells.extend(board.unsolved_cells)
+
+        if not solver.deduce(board):
+            board.rollback(start)
+            return False
+
+        subtrees = self.split(board, solver)
+
+        if not board.unsolved_cells:
+            return True
+
+        workers = self.workers or os.cpu_count() or 1
+
+        # Terminating the pool on the way out of the with block cancels any subtree that is still being searched.
+        with multiprocessing.Pool(min(workers, len(subtrees) or 1)) as pool:
+            for solution in pool.imap_unordered(solve_subtree, [(values, guesses) for guesses in subtrees]):
+                if solution is not None:
+                    for cell in list(board.unsolved_cells):
+                        board.make_move(cell, solution[cell])
+
+                    return True
+
+        board.rollback(start)
+        return False
+
+    # Makes the first guesses of the search on an already deduced board, and returns the list of guesses that leads to each subtree that is still open. Subtrees that deduction proves to be dead ends are left out. If deduction solves a subtree outright, the board is left solved and an empty list is returned.
+    def split(self, board, solver):
+        target = (self.workers or os.cpu_count() or 1) * self.subtrees_per_worker
+        subtrees = [[]]
+
+        for depth in range(self.split_depth):
+            if len(subtrees) >= target:
+                break
+
+            next_subtrees = []
+
+            for guesses in subtrees:
+                checkpoint = board.checkpoint()
+
+                for cell, value in guesses:
+                    board.make_move(cell, value)
+
+                if solver.deduce(board):
+                    curr_cell = board.get_most_constrained_cell()
+
+                    if curr_cell is None:
+                        return []
+
+                    options = board.get_options(curr_cell)
+
+                    while options:
+                        bit = options & -options
+                        options ^= bit
+                        next_subtrees.append(guesses + [(curr_cell, bit.bit_length())])
+
+                board.rollback(checkpoint)
+
+            subtrees = next_subtrees
+
+        return subtrees
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # change this to the input file that you'd like to test, or pass it as an argument
+    board = Board(sys.argv[1] if len(sys.argv) > 1 else 'tests/named-boards/saúl.csv')
+    start = time.perf_counter()
+    solved = Solver().solveBoard(board)
+    print('%s in %.3fs' % ('Solved' if solved else 'No solution', time.perf_counter() - start))
+    board.print()
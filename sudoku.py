@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+
+# Command line entry point for the a2 solver. Run it as a module from the repository root:
+#
+#   python -m sudoku solve tests/test-3-hard/ --out solutions/
+#   python -m sudoku solve tests/ --workers 8 --timeout 60
+#   python -m sudoku convert tests/test-1-easy/ --out easy.sdk
+#   python -m sudoku solve easy.sdk
+#   python -m sudoku stream < puzzles.txt > solutions.txt
+#   python -m sudoku generate --count 100 --symmetry rotational > puzzles.txt
+#   python -m sudoku grade tests/test-3-hard/
+#
+# Every board is printed with its solve time as it finishes, followed by the aggregate throughput. The stream command instead reads one board per line (see line_format.py) and writes one solution per line.
+
+import argparse
+import sys
+import time
+
+import a2
+import batch
+import canonical
+import corpus
+import generator
+import grader
+import line_format
+
+
+def solve(args):
+    num_boards = 0
+    num_solved = 0
+    start = time.perf_counter()
+
+    if args.workers == 1:
+        results = batch.solve_boards(args.paths, out_dir=args.out, timeout=args.timeout)
+    else:
+        results = batch.solve_boards_parallel(args.paths, out_dir=args.out, timeout=args.timeout, workers=args.workers, chunksize=args.chunksize)
+
+    for name, status, seconds in results:
+        num_boards += 1
+        num_solved += status == 'solved'
+
+        if not args.quiet:
+            print('%-40s %-8s %9.3fms' % (name, status, seconds * 1000), flush=True)
+
+    print(batch.summarize(num_boards, num_solved, time.perf_counter() - start))
+    return 0 if num_solved == num_boards else 1
+
+
+def convert(args):
+    boards = ((name, a2.read_sudoku(path) if index is None else batch.load_board(path, index).values) for path, index, name in batch.find_boards(args.paths))
+
+    try:
+        count = corpus.write_corpus(args.out, boards, save_names=not args.no_names)
+    except ValueError as err:
+        print('Could not convert: %s' % err, file=sys.stderr)
+        return 1
+
+    print('Wrote %d boards to %s' % (count, args.out))
+    return 0
+
+
+def stream(args):
+    solver = a2.Solver(max_seconds=args.timeout)
+
+    if args.cache:
+        solver = canonical.Solver(solver, max_size=args.cache)
+
+    num_boards, num_solved = line_format.solve_stream(sys.stdin, sys.stdout, solver, errors=None if args.quiet else sys.stderr, batch_size=args.batch)
+    return 0 if num_solved == num_boards else 1
+
+
+def generate(args):
+    max_nodes = 'auto' if args.max_nodes is None else args.max_nodes or None
+    puzzle_generator = generator.Generator(args.size, args.symmetry, seed=args.seed, max_nodes=max_nodes)
+
+    for _ in range(args.count):
+        puzzle, solution = puzzle_generator.generate(args.min_clues)
+        print(line_format.format_line(puzzle), flush=True)
+
+    return 0
+
+
+def grade(args):
+    board_grader = grader.Grader(max_seconds=args.timeout)
+    num_boards = 0
+    num_solved = 0
+
+    for path, index, name in batch.find_boards(args.paths):
+        board_grade = board_grader.grade(batch.load_board(path, index))
+        score = '-' if board_grade.score is None else '%.2f' % board_grade.score
+        num_boards += 1
+        num_solved += board_grade.solved
+        print('%-40s %6s  %-17s %-8s %6i guesses' % (name, score, board_grade.hardest, 'solved' if board_grade.solved else 'unsolved', board_grade.nodes), flush=True)
+
+    return 0 if num_solved == num_boards else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sudoku', description='Solve sudoku boards with the a2 solver.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    solve_parser = commands.add_parser('solve', help='solve csv boards in the given files and directories')
+    solve_parser.add_argument('paths', nargs='+', help='csv boards, packed %s files, or directories to search for csv boards' % corpus.EXTENSION)
+    solve_parser.add_argument('--out', help='directory to save the solved boards to')
+    solve_parser.add_argument('-q', '--quiet', action='store_true', help='only print the aggregate throughput')
+    solve_parser.add_argument('-j', '--workers', type=int, default=1, help='number of worker processes (0 for one per cpu, default 1)')
+    solve_parser.add_argument('--chunksize', type=int, default=4, help='boards handed to a worker at a time (default 4)')
+    solve_parser.add_argument('--timeout', type=float, help='seconds of searching before a board is given up on')
+    solve_parser.set_defaults(run=solve)
+
+    convert_parser = commands.add_parser('convert', help='pack csv boards of one size into a binary %s file' % corpus.EXTENSION)
+    convert_parser.add_argument('paths', nargs='+', help='csv boards, or directories to search for csv boards')
+    convert_parser.add_argument('--out', required=True, help='the packed file to write')
+    convert_parser.add_argument('--no-names', action='store_true', help='do not store the name of every board')
+    convert_parser.set_defaults(run=convert)
+
+    stream_parser = commands.add_parser('stream', help='solve one board per line from stdin, writing one solution per line to stdout')
+    stream_parser.add_argument('-q', '--quiet', action='store_true', help='do not report bad lines and unsolved boards on stderr')
+    stream_parser.add_argument('--timeout', type=float, help='seconds of searching before a board is given up on')
+    stream_parser.add_argument('--cache', type=int, default=0, help='remember the solutions of this many puzzles, so repeats of a puzzle (even relabelled, reordered or transposed) are not searched again')
+    stream_parser.add_argument('--batch', type=int, default=1, help='solve this many lines at a time with NumPy singles before falling back to the a2 solver (default 1, no batching)')
+    stream_parser.set_defaults(run=stream)
+
+    generate_parser = commands.add_parser('generate', help='generate puzzles with exactly one solution, one per line')
+    generate_parser.add_argument('-n', '--count', type=int, default=1, help='number of puzzles to generate (default 1)')
+    generate_parser.add_argument('--size', type=int, default=3, help='box size, e.g. 3 for 9x9 and 4 for 16x16 boards (default 3)')
+    generate_parser.add_argument('--symmetry', choices=sorted(generator.SYMMETRIES), default='none', help='symmetry of the clues (default none)')
+    generate_parser.add_argument('--min-clues', type=int, default=0, help='stop taking clues away at this many clues')
+    generate_parser.add_argument('--max-nodes', type=int, help='guesses a uniqueness test may make before its clues are kept (default no limit up to 9x9 and %i from 16x16 up, 0 for no limit)' % generator.LARGE_MAX_NODES)
+    generate_parser.add_argument('--seed', type=int, help='random seed, for repeatable output')
+    generate_parser.set_defaults(run=generate)
+
+    grade_parser = commands.add_parser('grade', help='score how hard boards are, by the techniques and guessing they need')
+    grade_parser.add_argument('paths', nargs='+', help='csv boards, packed %s files, or directories to search for csv boards' % corpus.EXTENSION)
+    grade_parser.add_argument('--timeout', type=float, help='seconds of searching before a board is given up on')
+    grade_parser.set_defaults(run=grade)
+
+    args = parser.parse_args(argv)
+
+    if getattr(args, 'workers', None) == 0:
+        args.workers = None
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())